@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from .models import CommEdge, Employee
+
+
+CACHE_TTL_SECONDS = float(os.getenv("ADJACENCY_TTL_SECONDS", "300"))
+
+
+class AdjacencyIndex:
+    def __init__(self, employees, rows):
+        # employees: id -> (name, role, team)
+        # rows: comm edge id -> (from, to, weight, message_count_30d, topics)
+        # edges: (from, to) -> [weight, message_count_30d] over all channels
+        # topics: id -> [(topic, weight)] strongest first
+        self.employees = employees
+        self.rows = {}
+        self.edges = {}
+        self.successors = defaultdict(list)
+        self._combined = defaultdict(lambda: defaultdict(float))
+        self._topic_weights = defaultdict(lambda: defaultdict(float))
+        for edge_id, row in rows.items():
+            self._add(row, 1)
+            self.rows[edge_id] = row
+        self.neighbors = {u: self._ranked_neighbors(u) for u in self._combined}
+        self.topics = {u: self._ranked_topics(u) for u in self._topic_weights}
+
+    @classmethod
+    def load(cls, session):
+        employees = {
+            emp_id: (name, role, team)
+            for emp_id, name, role, team in session.query(
+                Employee.id, Employee.full_name, Employee.role, Employee.team
+            ).filter(Employee.deleted_at.is_(None))
+        }
+        rows = {
+            edge_id: (u, v, weight, count, tuple(json.loads(topics or "[]")))
+            for edge_id, u, v, weight, count, topics in session.query(
+                CommEdge.id,
+                CommEdge.from_employee_id,
+                CommEdge.to_employee_id,
+                CommEdge.weight,
+                CommEdge.message_count_30d,
+                CommEdge.topics,
+            )
+        }
+        return cls(employees, rows)
+
+    def _add(self, row, sign):
+        u, v, weight, count, topics = row
+        pair = self.edges.get((u, v))
+        if pair is None:
+            pair = self.edges[(u, v)] = [0.0, 0]
+            self.successors[u].append(v)
+        pair[0] += sign * weight
+        pair[1] += sign * count
+        self._combined[u][v] += sign * weight
+        self._combined[v][u] += sign * weight
+        for topic in topics:
+            self._topic_weights[u][topic] += sign * weight
+
+    def _ranked_neighbors(self, u):
+        return sorted(((w, v) for v, w in self._combined[u].items()), key=lambda item: (-item[0], item[1]))
+
+    def _ranked_topics(self, u):
+        return sorted(self._topic_weights[u].items(), key=lambda item: (-item[1], item[0]))
+
+    def set_edge(self, edge_id, row):
+        # Replaces one comm edge's contribution. Idempotent, so replaying it on
+        # an index whose load already saw the write is harmless; message counts
+        # only grow, so a write applied out of order cannot roll one back.
+        old = self.rows.get(edge_id)
+        if old is not None:
+            if old[3] > row[3]:
+                return
+            self._add(old, -1)
+        self._add(row, 1)
+        self.rows[edge_id] = row
+        u, v = row[0], row[1]
+        # Whole lists are swapped in, so lock-free readers never see a
+        # half-sorted one.
+        self.neighbors[u] = self._ranked_neighbors(u)
+        self.neighbors[v] = self._ranked_neighbors(v)
+        self.topics[u] = self._ranked_topics(u)
+
+    def ego(self, center, depth=2, limit=50, topics_per_employee=3):
+        depth_of = {center: 0}
+        frontier = [center]
+        truncated = False
+        for hop in range(1, depth + 1):
+            # Candidates for this hop, ranked by their strongest tie into the
+            # current neighbourhood.
+            best = {}
+            for u in frontier:
+                for weight, v in self.neighbors.get(u, ()):
+                    if v not in depth_of and weight > best.get(v, 0.0):
+                        best[v] = weight
+            ranked = sorted(best, key=lambda v: (-best[v], v))
+            room = limit - (len(depth_of) - 1)
+            if len(ranked) > room:
+                ranked = ranked[:room]
+                truncated = True
+            for v in ranked:
+                depth_of[v] = hop
+            frontier = ranked
+            if not frontier:
+                break
+
+        employees = []
+        for emp_id, d in depth_of.items():
+            name, role, team = self.employees.get(emp_id, (None, None, None))
+            employees.append({"id": emp_id, "name": name, "role": role, "team": team, "depth": d})
+        edges = []
+        for u in depth_of:
+            for v in self.successors.get(u, ()):
+                if v in depth_of:
+                    weight, count = self.edges[(u, v)]
+                    edges.append(
+                        {"source": u, "target": v, "weight": round(weight, 3), "message_count_30d": count}
+                    )
+        topic_totals = defaultdict(float)
+        topic_edges = []
+        for emp_id in depth_of:
+            for topic, weight in self.topics.get(emp_id, ())[:topics_per_employee]:
+                topic_totals[topic] += weight
+                topic_edges.append({"employee_id": emp_id, "topic": topic, "weight": round(weight, 3)})
+        topics = [
+            {"name": t, "weight": round(w, 3)}
+            for t, w in sorted(topic_totals.items(), key=lambda item: (-item[1], item[0]))
+        ]
+        return {
+            "center": center,
+            "depth": depth,
+            "employees": employees,
+            "edges": edges,
+            "topics": topics,
+            "topic_edges": topic_edges,
+            "truncated": truncated,
+        }
+
+
+def edge_row(edge):
+    return (
+        edge.from_employee_id,
+        edge.to_employee_id,
+        edge.weight,
+        edge.message_count_30d,
+        tuple(json.loads(edge.topics or "[]")),
+    )
+
+
+class AdjacencyCache:
+    # Built on first use. A comm event patches its one edge in place; bulk
+    # writes (employee create/delete) invalidate it, and the TTL picks up
+    # writes made by other processes such as the seed/CLI. Only one request
+    # rebuilds at a time; the others keep using the stale index meanwhile.
+    def __init__(self, ttl=CACHE_TTL_SECONDS):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._index = None
+        self._built_at = 0.0
+        self._version = 0
+        self._building = False
+        self._pending = []
+
+    def _fresh(self):
+        return self._index is not None and time.monotonic() - self._built_at < self._ttl
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+            self._version += 1
+
+    def apply_edge(self, edge_id, row):
+        with self._lock:
+            if self._index is not None:
+                self._index.set_edge(edge_id, row)
+            if self._building:
+                # The load in progress may have read this edge before the
+                # write; it is replayed onto the new index before swapping in.
+                self._pending.append((edge_id, row))
+
+    def get(self, session):
+        with self._lock:
+            if self._fresh():
+                return self._index
+            stale = self._index
+        if not self._build_lock.acquire(blocking=stale is None):
+            return stale
+        try:
+            with self._lock:
+                # Built by another request while this one waited.
+                if self._fresh():
+                    return self._index
+                version = self._version
+                self._building = True
+                self._pending = []
+            index = None
+            try:
+                index = AdjacencyIndex.load(session)
+            finally:
+                with self._lock:
+                    self._building = False
+                    pending, self._pending = self._pending, []
+                    # An invalidation during the load means a bulk write it
+                    # may have missed; serve it once but do not cache it.
+                    if index is not None and version == self._version:
+                        for edge_id, row in pending:
+                            index.set_edge(edge_id, row)
+                        self._index = index
+                        self._built_at = time.monotonic()
+            return index
+        finally:
+            self._build_lock.release()
+
+
+adjacency_cache = AdjacencyCache()
@@ -0,0 +1,129 @@
+from .parquet_export import DEFAULT_DIR, pa, require_arrow
+
+if pa is not None:
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+
+# Trend queries over the Parquet export (see parquet_export.py). They never
+# touch the live database: partitions outside the month range are pruned by
+# directory name and the rest is aggregated with Arrow's vectorized kernels.
+
+
+def _dataset(root, table):
+    path = root / table
+    if not path.is_dir():
+        return None
+    return ds.dataset(
+        path,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive"),
+    )
+
+
+def _month_filter(since=None, until=None):
+    expr = None
+    if since:
+        expr = ds.field("month") >= since
+    if until:
+        upper = ds.field("month") <= until
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+def _by_name(grouped, keys, column):
+    return pa.table(
+        [grouped[k] for k in keys] + [grouped[column].cast(pa.int64())], names=keys + ["messages"]
+    )
+
+
+def message_counts(keys, root=DEFAULT_DIR, since=None, until=None, topics=None):
+    # Raw events count one message each; compacted daily rollups carry their
+    # message_count, so trends stay complete after retention has run.
+    require_arrow()
+    keys = list(keys)
+    parts = []
+    for table, weight in (("comm_events", None), ("comm_daily_rollups", "message_count")):
+        dataset = _dataset(root, table)
+        if dataset is None:
+            continue
+        expr = _month_filter(since, until)
+        if topics:
+            chosen = ds.field("topic").isin(topics)
+            expr = chosen if expr is None else expr & chosen
+        scanned = dataset.to_table(columns=keys + ([weight] if weight else []), filter=expr)
+        # Dictionaries differ per file; group on plain strings.
+        scanned = pa.table(
+            [c.cast(pa.string()) if pa.types.is_dictionary(c.type) else c for c in scanned.columns],
+            names=scanned.column_names,
+        )
+        if weight:
+            parts.append(_by_name(scanned.group_by(keys).aggregate([(weight, "sum")]), keys, f"{weight}_sum"))
+        else:
+            parts.append(_by_name(scanned.group_by(keys).aggregate([([], "count_all")]), keys, "count_all"))
+    if not parts:
+        return pa.table({**{k: pa.array([], pa.string()) for k in keys}, "messages": pa.array([], pa.int64())})
+    combined = pa.concat_tables(parts).group_by(keys).aggregate([("messages", "sum")])
+    return _by_name(combined, keys, "messages_sum")
+
+
+def _sorted(table, keys):
+    return table.sort_by(keys).to_pylist()
+
+
+def topic_trends(root=DEFAULT_DIR, since=None, until=None, topics=None):
+    # Shares are of all messages that month, so the topic filter only
+    # applies to the per-topic rows.
+    table = message_counts(["month", "topic"], root, since, until, topics)
+    totals = message_counts(["month"], root, since, until)
+    table = table.join(totals.rename_columns(["month", "month_total"]), "month")
+    share = pc.round(pc.divide(pc.cast(table["messages"], pa.float64()), table["month_total"]), 4)
+    table = table.drop_columns(["month_total"]).append_column("share", share)
+    return _sorted(table, [("month", "ascending"), ("messages", "descending"), ("topic", "ascending")])
+
+
+def _topic_counts(table, month):
+    if month is None:
+        return {}
+    rows = table.filter(pc.equal(table["month"], month))
+    return dict(zip(rows["topic"].to_pylist(), rows["messages"].to_pylist()))
+
+
+def topic_movers(root=DEFAULT_DIR, month=None, previous=None, limit=10):
+    # Biggest month-over-month changes in topic volume; defaults to the
+    # latest exported month against the one before it.
+    table = message_counts(["month", "topic"], root, previous, month)
+    months = sorted(set(table["month"].to_pylist()))
+    if not months:
+        return []
+    month = month or months[-1]
+    if previous is None:
+        previous = next((m for m in reversed(months) if m < month), None)
+    now = _topic_counts(table, month)
+    then = _topic_counts(table, previous)
+    rows = [
+        {
+            "topic": topic,
+            "month": month,
+            "previous_month": previous,
+            "messages": now.get(topic, 0),
+            "previous_messages": then.get(topic, 0),
+            "change": now.get(topic, 0) - then.get(topic, 0),
+        }
+        for topic in set(now) | set(then)
+    ]
+    rows.sort(key=lambda r: (-abs(r["change"]), r["topic"]))
+    return rows[:limit]
+
+
+def team_volume(root=DEFAULT_DIR, since=None, until=None, cross_team_only=False, limit=None):
+    table = message_counts(["from_team", "to_team"], root, since, until)
+    if cross_team_only:
+        table = table.filter(pc.not_equal(table["from_team"], table["to_team"]))
+    rows = _sorted(table, [("messages", "descending"), ("from_team", "ascending"), ("to_team", "ascending")])
+    return rows[:limit] if limit else rows
+
+
+def channel_mix(root=DEFAULT_DIR, since=None, until=None):
+    table = message_counts(["month", "channel"], root, since, until)
+    return _sorted(table, [("month", "ascending"), ("channel", "ascending")])
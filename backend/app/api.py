@@ -1,15 +1,25 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Literal
+import asyncio
 import json
-
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import desc
+import os
+
+from fastapi import (
+    BackgroundTasks,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import desc, func, insert
 from pydantic import BaseModel
-from pathlib import Path
 
-from .db import SessionLocal
+from .db import SessionLocal, engine
 from .models import (
     Employee,
     CommEdge,
@@ -20,20 +30,55 @@ from .models import (
     BoardCard,
     ChangeLog,
 )
+from .changelog import (
+    ChangeLogQuery,
+    change_log_writer,
+    decode_cursor,
+    encode_cursor,
+    query_archive,
+    query_live,
+    sort_key,
+)
+from .metrics import MetricsMiddleware, install_query_hooks, registry
+from . import querywatch
+from .querywatch import QueryWatchMiddleware
+from .adjacency import adjacency_cache, edge_row
+from .expertise import experts, record_event
+from . import hierarchy
+from .deletion import DeletionConflict, delete_board, delete_employee
 from .graph import graph_summary, build_knowledge_graph, build_department_graph
+from .search import SEARCH_TYPES, SearchUnavailable, search
+from .ranking import needs_rebalance, place_card, rebalance_column
+from .stream import broker, event_json, format_sse
+from .views import include_views
+
 
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Flush buffered change log entries before the process exits.
+    change_log_writer.close()
 
-app = FastAPI(title="Org Graph + Tasks")
-BASE_DIR = Path(__file__).resolve().parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+app = FastAPI(title="Org Graph + Tasks", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+install_query_hooks(engine)
+if querywatch.ENABLED:
+    querywatch.install()
+    app.add_middleware(QueryWatchMiddleware)
+if os.getenv("HTML_VIEWS", "1").lower() not in ("0", "false", "no"):
+    include_views(app)
 
 
 def get_session():
     return SessionLocal()
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 class CommEventIn(BaseModel):
     timestamp: datetime
     from_employee_id: int
@@ -55,6 +100,10 @@ class EmployeeIn(BaseModel):
     start_date: str
 
 
+class ManagerIn(BaseModel):
+    manager_id: int | None = None
+
+
 class TaskIn(BaseModel):
     title: str
     description: str
@@ -68,6 +117,42 @@ class TaskIn(BaseModel):
     parent_board_id: int | None = None
 
 
+class TaskPatch(BaseModel):
+    title: str | None = None
+    description: str | None = None
+    status: str | None = None
+    priority: str | None = None
+    assignee_id: int | None = None
+    reporter_id: int | None = None
+    due_date: str | None = None
+    labels: list[str] | None = None
+    related_topic: str | None = None
+    parent_board_id: int | None = None
+
+
+class TaskBatchOp(BaseModel):
+    op: Literal["create", "update", "delete", "move"]
+    task_id: int | None = None
+    task: TaskIn | None = None
+    changes: TaskPatch | None = None
+    column_id: int | None = None
+    after_card_id: int | None = None
+    before_card_id: int | None = None
+
+
+class TaskBatchIn(BaseModel):
+    operations: list[TaskBatchOp]
+    source: str = "api"
+    evidence: str | None = None
+
+
+class CardMoveIn(BaseModel):
+    card_id: int
+    column_id: int
+    after_card_id: int | None = None
+    before_card_id: int | None = None
+
+
 class ChangeLogIn(BaseModel):
     action: str
     entity_type: str
@@ -78,13 +163,117 @@ class ChangeLogIn(BaseModel):
     source: str
 
 
+def _get_employee(session, employee_id):
+    emp = session.get(Employee, employee_id)
+    if not emp or emp.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return emp
+
+
+def _edge_dict(e):
+    return {
+        "id": e.id,
+        "from_employee_id": e.from_employee_id,
+        "to_employee_id": e.to_employee_id,
+        "channel": e.channel,
+        "capacity": e.capacity,
+        "weight": e.weight,
+        "message_count_30d": e.message_count_30d,
+        "last_interaction_at": e.last_interaction_at.isoformat(),
+        "topics": json.loads(e.topics),
+        "notes": e.notes,
+    }
+
+
+def _task_dict(t):
+    return {
+        "id": t.id,
+        "title": t.title,
+        "description": t.description,
+        "status": t.status,
+        "priority": t.priority,
+        "assignee_id": t.assignee_id,
+        "reporter_id": t.reporter_id,
+        "created_at": t.created_at.isoformat(),
+        "updated_at": t.updated_at.isoformat(),
+        "due_date": t.due_date.isoformat() if t.due_date else None,
+        "labels": json.loads(t.labels),
+        "related_topic": t.related_topic,
+        "parent_board_id": t.parent_board_id,
+    }
+
+
+def _task_scope(*tasks):
+    return {
+        "board_ids": [t["parent_board_id"] for t in tasks],
+        "employee_ids": [i for t in tasks for i in (t["assignee_id"], t["reporter_id"])],
+    }
+
+
+REQUIRED_TASK_FIELDS = {"title", "description", "status", "priority", "reporter_id", "labels", "related_topic"}
+
+
+def _patch_fields(payload: TaskPatch):
+    fields = payload.model_dump(exclude_unset=True)
+    nulls = sorted(k for k, v in fields.items() if v is None and k in REQUIRED_TASK_FIELDS)
+    if nulls:
+        raise HTTPException(status_code=422, detail=f"Fields cannot be null: {nulls}")
+    return fields
+
+
+def _apply_task_fields(task, fields):
+    for key, value in fields.items():
+        if key == "due_date":
+            value = datetime.fromisoformat(value).date() if value else None
+        elif key == "labels":
+            value = json.dumps(value)
+        setattr(task, key, value)
+    task.updated_at = datetime.utcnow()
+
+
+def _new_task(payload: TaskIn):
+    task = Task(created_at=datetime.utcnow())
+    _apply_task_fields(task, payload.model_dump())
+    return task
+
+
+def _task_log_row(action, task_id, before, after, payload: TaskBatchIn, created_at):
+    return {
+        "action": action,
+        "entity_type": "task",
+        "entity_id": str(task_id),
+        "before_json": json.dumps(before) if before is not None else None,
+        "after_json": json.dumps(after) if after is not None else None,
+        "evidence": payload.evidence,
+        "source": payload.source,
+        "created_at": created_at,
+    }
+
+
+def _card_dict(c, position=None):
+    return {
+        "id": c.id,
+        "task_id": c.task_id,
+        "column_id": c.column_id,
+        "order_index": position if position is not None else c.order_index,
+        "rank": c.rank,
+    }
+
+
+def _rebalance_column_job(column_id):
+    session = get_session()
+    try:
+        rebalance_column(session, column_id)
+        session.commit()
+    finally:
+        session.close()
 
 
 @app.get("/api/graph/employees")
 def api_employees():
     session = get_session()
     try:
-        employees = session.query(Employee).all()
+        employees = session.query(Employee).filter(Employee.deleted_at.is_(None)).all()
         return [
             {
                 "id": e.id,
@@ -118,23 +307,105 @@ def api_create_employee(payload: EmployeeIn):
             start_date=datetime.fromisoformat(payload.start_date).date(),
         )
         session.add(emp)
+        session.flush()
+        hierarchy.add_employee(session, emp.id, emp.manager_id)
         session.commit()
-        session.refresh(emp)
+        adjacency_cache.invalidate()
         return {"id": emp.id}
     finally:
         session.close()
 
 
 @app.delete("/api/employees/{employee_id}")
-def api_delete_employee(employee_id: int):
+def api_delete_employee(
+    employee_id: int,
+    mode: Literal["hard", "soft"] = "hard",
+    reassign_to: int | None = None,
+):
     session = get_session()
     try:
-        emp = session.query(Employee).filter(Employee.id == employee_id).first()
-        if not emp:
+        if reassign_to is not None:
+            _get_employee(session, reassign_to)
+        try:
+            counts = delete_employee(session, employee_id, hard=mode == "hard", reassign_to=reassign_to)
+        except DeletionConflict as exc:
+            session.rollback()
+            raise HTTPException(status_code=409, detail=str(exc))
+        if counts is None:
             raise HTTPException(status_code=404, detail="Employee not found")
-        session.delete(emp)
         session.commit()
-        return {"status": "deleted"}
+        adjacency_cache.invalidate()
+        broker.publish("employee.deleted", {"id": employee_id, "mode": mode}, employee_ids=(employee_id,))
+        return {"status": "deleted", "mode": mode, **counts}
+    finally:
+        session.close()
+
+
+@app.put("/api/employees/{employee_id}/manager")
+def api_set_manager(employee_id: int, payload: ManagerIn):
+    session = get_session()
+    try:
+        _get_employee(session, employee_id)
+        if payload.manager_id is not None:
+            _get_employee(session, payload.manager_id)
+        try:
+            hierarchy.move_employee(session, employee_id, payload.manager_id)
+        except hierarchy.HierarchyError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        session.commit()
+        return {"status": "updated"}
+    finally:
+        session.close()
+
+
+@app.get("/api/org/{employee_id}/subtree")
+def api_org_subtree(
+    employee_id: int,
+    max_depth: int | None = Query(None, ge=1, le=hierarchy.MAX_DEPTH),
+    limit: int = Query(200, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    session = get_session()
+    try:
+        _get_employee(session, employee_id)
+        rows = hierarchy.subtree(session, employee_id, max_depth=max_depth, limit=limit + 1, offset=offset)
+        return {
+            "employee_id": employee_id,
+            "employees": rows[:limit],
+            "next_offset": offset + limit if len(rows) > limit else None,
+        }
+    finally:
+        session.close()
+
+
+@app.get("/api/org/{employee_id}/ancestors")
+def api_org_ancestors(employee_id: int):
+    session = get_session()
+    try:
+        _get_employee(session, employee_id)
+        return {"employee_id": employee_id, "ancestors": hierarchy.ancestors(session, employee_id)}
+    finally:
+        session.close()
+
+
+@app.get("/api/org/{employee_id}/span")
+def api_org_span(employee_id: int):
+    session = get_session()
+    try:
+        _get_employee(session, employee_id)
+        return hierarchy.span_of_control(session, employee_id)
+    finally:
+        session.close()
+
+
+@app.get("/api/org/{employee_id}/rollup")
+def api_org_rollup(employee_id: int, days: int = Query(30, ge=1, le=365)):
+    session = get_session()
+    try:
+        result = hierarchy.rollup(session, employee_id, days=days)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        return result
     finally:
         session.close()
 
@@ -144,21 +415,7 @@ def api_edges():
     session = get_session()
     try:
         edges = session.query(CommEdge).order_by(desc(CommEdge.weight)).all()
-        return [
-            {
-                "id": e.id,
-                "from_employee_id": e.from_employee_id,
-                "to_employee_id": e.to_employee_id,
-                "channel": e.channel,
-                "capacity": e.capacity,
-                "weight": e.weight,
-                "message_count_30d": e.message_count_30d,
-                "last_interaction_at": e.last_interaction_at.isoformat(),
-                "topics": json.loads(e.topics),
-                "notes": e.notes,
-            }
-            for e in edges
-        ]
+        return [_edge_dict(e) for e in edges]
     finally:
         session.close()
 
@@ -167,6 +424,12 @@ def api_edges():
 def api_create_comm_event(payload: CommEventIn):
     session = get_session()
     try:
+        participants = {payload.from_employee_id, payload.to_employee_id}
+        active = session.query(func.count(Employee.id)).filter(
+            Employee.id.in_(participants), Employee.deleted_at.is_(None)
+        ).scalar()
+        if active != len(participants):
+            raise HTTPException(status_code=404, detail="Employee not found")
         event = CommEvent(
             timestamp=payload.timestamp,
             from_employee_id=payload.from_employee_id,
@@ -177,6 +440,13 @@ def api_create_comm_event(payload: CommEventIn):
             summary=payload.summary,
         )
         session.add(event)
+        record_event(
+            session,
+            payload.from_employee_id,
+            payload.to_employee_id,
+            payload.topic,
+            payload.timestamp,
+        )
 
         edge = (
             session.query(CommEdge)
@@ -210,56 +480,21 @@ def api_create_comm_event(payload: CommEventIn):
             )
             session.add(edge)
 
+        session.flush()
+        delta = {"summary": payload.summary, "topic": payload.topic, "edge": _edge_dict(edge)}
+        row = edge_row(edge)
         session.commit()
-        return {"status": "ok", "edge_id": edge.id}
-    finally:
-        session.close()
-
-
-@app.get("/graph", response_class=HTMLResponse)
-def graph_view(request: Request, employee_id: int | None = None):
-    session = get_session()
-    try:
-        employees = session.query(Employee).all()
-        top_edges = (
-            session.query(CommEdge).order_by(desc(CommEdge.weight)).limit(20).all()
-        )
-        summary = graph_summary(session)
-
-        top_contacts = []
-        if employee_id:
-            top_contacts = (
-                session.query(CommEdge)
-                .filter(CommEdge.from_employee_id == employee_id)
-                .order_by(desc(CommEdge.weight))
-                .limit(10)
-                .all()
-            )
-
-        return templates.TemplateResponse(
-            "graph.html",
-            {
-                "request": request,
-                "employees": employees,
-                "top_edges": top_edges,
-                "top_contacts": top_contacts,
-                "selected_employee_id": employee_id,
-                "summary": summary,
-            },
+        adjacency_cache.apply_edge(delta["edge"]["id"], row)
+        broker.publish(
+            "comm_event.created",
+            delta,
+            employee_ids=(payload.from_employee_id, payload.to_employee_id),
         )
+        return {"status": "ok", "edge_id": delta["edge"]["id"]}
     finally:
         session.close()
 
 
-@app.get("/graph/viz", response_class=HTMLResponse)
-def graph_viz(request: Request):
-    return templates.TemplateResponse("graph_viz.html", {"request": request})
-
-
-@app.get("/graph/departments", response_class=HTMLResponse)
-def graph_departments(request: Request):
-    return templates.TemplateResponse("graph_departments.html", {"request": request})
-
 @app.get("/api/graph/summary")
 def api_graph_summary():
     session = get_session()
@@ -270,14 +505,14 @@ def api_graph_summary():
 
 
 @app.get("/api/graph/knowledge")
-def api_graph_knowledge():
+def api_graph_knowledge(
+    min_weight: float | None = Query(None, ge=0),
+    top_k_per_employee: int | None = Query(None, ge=1),
+):
     session = get_session()
     try:
-        G = build_knowledge_graph(session)
-        nodes = [
-            {"id": n, **G.nodes[n]}
-            for n in G.nodes
-        ]
+        G = build_knowledge_graph(session, min_weight=min_weight, top_k_per_employee=top_k_per_employee)
+        nodes = [{"id": n, **data} for n, data in G.nodes(data=True)]
         edges = [
             {"source": u, "target": v, **data}
             for u, v, data in G.edges(data=True)
@@ -296,29 +531,69 @@ def api_graph_departments():
         session.close()
 
 
+@app.get("/api/graph/ego/{employee_id}")
+def api_graph_ego(
+    employee_id: int,
+    depth: int = Query(2, ge=1, le=4),
+    limit: int = Query(50, ge=1, le=1000),
+    topics_per_employee: int = Query(3, ge=0, le=20),
+):
+    session = get_session()
+    try:
+        index = adjacency_cache.get(session)
+        if employee_id not in index.employees:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        return index.ego(employee_id, depth=depth, limit=limit, topics_per_employee=topics_per_employee)
+    finally:
+        session.close()
+
+
+@app.get("/api/experts")
+def api_experts(
+    topic: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+    sort: Literal["score", "sent", "received", "counterparts"] = "score",
+):
+    session = get_session()
+    try:
+        return {"topic": topic, "experts": experts(session, topic, limit=limit, sort=sort)}
+    finally:
+        session.close()
+
+
+@app.get("/api/search")
+def api_search(
+    q: str = Query(..., min_length=1),
+    types: str | None = Query(None, description="Comma-separated subset of comm_event,task,change_log"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+):
+    selected = None
+    if types:
+        selected = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = [t for t in selected if t not in SEARCH_TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(unknown)}")
+    session = get_session()
+    try:
+        try:
+            results = search(session, q, types=selected, limit=limit + 1, offset=offset)
+        except SearchUnavailable as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+        return {
+            "results": results[:limit],
+            "next_offset": offset + limit if len(results) > limit else None,
+        }
+    finally:
+        session.close()
+
+
 @app.get("/api/tasks")
 def api_tasks():
     session = get_session()
     try:
         tasks = session.query(Task).all()
-        return [
-            {
-                "id": t.id,
-                "title": t.title,
-                "description": t.description,
-                "status": t.status,
-                "priority": t.priority,
-                "assignee_id": t.assignee_id,
-                "reporter_id": t.reporter_id,
-                "created_at": t.created_at.isoformat(),
-                "updated_at": t.updated_at.isoformat(),
-                "due_date": t.due_date.isoformat() if t.due_date else None,
-                "labels": json.loads(t.labels),
-                "related_topic": t.related_topic,
-                "parent_board_id": t.parent_board_id,
-            }
-            for t in tasks
-        ]
+        return [_task_dict(t) for t in tasks]
     finally:
         session.close()
 
@@ -327,24 +602,13 @@ def api_tasks():
 def api_create_task(payload: TaskIn):
     session = get_session()
     try:
-        task = Task(
-            title=payload.title,
-            description=payload.description,
-            status=payload.status,
-            priority=payload.priority,
-            assignee_id=payload.assignee_id,
-            reporter_id=payload.reporter_id,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-            due_date=datetime.fromisoformat(payload.due_date).date() if payload.due_date else None,
-            labels=json.dumps(payload.labels),
-            related_topic=payload.related_topic,
-            parent_board_id=payload.parent_board_id,
-        )
+        task = _new_task(payload)
         session.add(task)
+        session.flush()
+        delta = _task_dict(task)
         session.commit()
-        session.refresh(task)
-        return {"id": task.id}
+        broker.publish("task.created", delta, **_task_scope(delta))
+        return {"id": delta["id"]}
     finally:
         session.close()
 
@@ -356,23 +620,147 @@ def api_update_task(task_id: int, payload: TaskIn):
         task = session.query(Task).filter(Task.id == task_id).first()
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
-        task.title = payload.title
-        task.description = payload.description
-        task.status = payload.status
-        task.priority = payload.priority
-        task.assignee_id = payload.assignee_id
-        task.reporter_id = payload.reporter_id
-        task.updated_at = datetime.utcnow()
-        task.due_date = datetime.fromisoformat(payload.due_date).date() if payload.due_date else None
-        task.labels = json.dumps(payload.labels)
-        task.related_topic = payload.related_topic
-        task.parent_board_id = payload.parent_board_id
+        before = _task_dict(task)
+        _apply_task_fields(task, payload.model_dump())
+        session.flush()
+        delta = _task_dict(task)
         session.commit()
+        broker.publish("task.updated", delta, **_task_scope(before, delta))
         return {"status": "updated"}
     finally:
         session.close()
 
 
+@app.patch("/api/tasks/{task_id}")
+def api_patch_task(task_id: int, payload: TaskPatch):
+    fields = _patch_fields(payload)
+    session = get_session()
+    try:
+        task = session.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        before = _task_dict(task)
+        _apply_task_fields(task, fields)
+        session.flush()
+        delta = _task_dict(task)
+        session.commit()
+        broker.publish("task.updated", delta, **_task_scope(before, delta))
+        return {"status": "updated"}
+    finally:
+        session.close()
+
+
+@app.post("/api/tasks/batch")
+def api_task_batch(payload: TaskBatchIn, background_tasks: BackgroundTasks):
+    session = get_session()
+    try:
+        task_ids = {op.task_id for op in payload.operations if op.op != "create"}
+        if None in task_ids:
+            raise HTTPException(status_code=422, detail="task_id is required for update/delete/move")
+        tasks = {}
+        if task_ids:
+            tasks = {t.id: t for t in session.query(Task).filter(Task.id.in_(task_ids)).all()}
+        missing = sorted(task_ids - tasks.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Tasks not found: {missing}")
+
+        column_ids = {op.column_id for op in payload.operations if op.op == "move"}
+        if None in column_ids:
+            raise HTTPException(status_code=422, detail="column_id is required for move")
+        columns = {}
+        cards = {}
+        if column_ids:
+            columns = {
+                c.id: c
+                for c in session.query(BoardColumn).filter(BoardColumn.id.in_(column_ids)).all()
+            }
+            missing = sorted(column_ids - columns.keys())
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Columns not found: {missing}")
+            moved_ids = {op.task_id for op in payload.operations if op.op == "move"}
+            cards = {
+                c.task_id: c
+                for c in session.query(BoardCard).filter(BoardCard.task_id.in_(moved_ids)).all()
+            }
+
+        now = datetime.utcnow()
+        results = []
+        log_rows = []
+        events = []
+        deleted_ids = []
+        crowded_columns = set()
+        for index, op in enumerate(payload.operations):
+            if op.op == "create":
+                if op.task is None:
+                    raise HTTPException(status_code=422, detail=f"Operation {index}: task is required for create")
+                task = _new_task(op.task)
+                session.add(task)
+                session.flush()
+                after = _task_dict(task)
+                tasks[task.id] = task
+                results.append({"op": op.op, "id": task.id})
+                log_rows.append(_task_log_row("create", task.id, None, after, payload, now))
+                events.append(("task.created", after, _task_scope(after)))
+                continue
+
+            task = tasks[op.task_id]
+            if task.id in deleted_ids:
+                raise HTTPException(status_code=409, detail=f"Operation {index}: task {task.id} was deleted")
+            before = _task_dict(task)
+            if op.op == "delete":
+                deleted_ids.append(task.id)
+                cards.pop(task.id, None)
+                results.append({"op": op.op, "id": task.id})
+                log_rows.append(_task_log_row("delete", task.id, before, None, payload, now))
+                events.append(("task.deleted", {"id": task.id}, _task_scope(before)))
+                continue
+
+            if op.changes is not None:
+                _apply_task_fields(task, _patch_fields(op.changes))
+            if op.op == "move":
+                column = columns[op.column_id]
+                card = cards.get(task.id)
+                if card is None:
+                    card = BoardCard(task_id=task.id, column_id=column.id, order_index=0)
+                    session.add(card)
+                    cards[task.id] = card
+                card.board_id = column.board_id
+                try:
+                    rank = place_card(session, card, column.id, op.after_card_id, op.before_card_id)
+                except ValueError as exc:
+                    raise HTTPException(status_code=422, detail=f"Operation {index}: {exc}")
+                if needs_rebalance(rank):
+                    crowded_columns.add(column.id)
+                task.parent_board_id = column.board_id
+                task.updated_at = now
+            elif op.changes is None:
+                raise HTTPException(status_code=422, detail=f"Operation {index}: changes are required for update")
+            session.flush()
+            after = _task_dict(task)
+            if op.op == "move":
+                after["card"] = _card_dict(card)
+            results.append({"op": op.op, "id": task.id})
+            log_rows.append(_task_log_row(op.op, task.id, before, after, payload, now))
+            events.append(("task.updated", after, _task_scope(before, after)))
+
+        if deleted_ids:
+            session.query(BoardCard).filter(BoardCard.task_id.in_(deleted_ids)).delete(
+                synchronize_session=False
+            )
+            session.query(Task).filter(Task.id.in_(deleted_ids)).delete(synchronize_session=False)
+        if log_rows:
+            session.execute(insert(ChangeLog), log_rows)
+        session.commit()
+
+        for kind, data, scope in events:
+            broker.publish(kind, data, **scope)
+        for column_id in crowded_columns:
+            background_tasks.add_task(_rebalance_column_job, column_id)
+        return {"results": results}
+    finally:
+        session.close()
+
+
 @app.delete("/api/tasks/{task_id}")
 def api_delete_task(task_id: int):
     session = get_session()
@@ -380,9 +768,11 @@ def api_delete_task(task_id: int):
         task = session.query(Task).filter(Task.id == task_id).first()
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
+        before = _task_dict(task)
         session.query(BoardCard).filter(BoardCard.task_id == task_id).delete(synchronize_session=False)
         session.delete(task)
         session.commit()
+        broker.publish("task.deleted", {"id": task_id}, **_task_scope(before))
         return {"status": "deleted"}
     finally:
         session.close()
@@ -423,9 +813,15 @@ def api_board(board_id: int):
         cards = (
             session.query(BoardCard)
             .filter(BoardCard.board_id == board_id)
-            .order_by(BoardCard.order_index)
+            .order_by(BoardCard.rank, BoardCard.id)
             .all()
         )
+        positions = {}
+        card_list = []
+        for c in cards:
+            position = positions.get(c.column_id, 0)
+            positions[c.column_id] = position + 1
+            card_list.append(_card_dict(c, position))
 
         return {
             "board": {
@@ -435,167 +831,197 @@ def api_board(board_id: int):
                 "owner_id": board.owner_id,
             },
             "columns": [{"id": c.id, "name": c.name} for c in columns],
-            "cards": [
-                {
-                    "id": c.id,
-                    "task_id": c.task_id,
-                    "column_id": c.column_id,
-                    "order_index": c.order_index,
-                }
-                for c in cards
-            ],
+            "cards": card_list,
         }
     finally:
         session.close()
 
 
-@app.get("/api/change-log")
-def api_change_log():
+@app.post("/api/boards/{board_id}/cards/move")
+def api_move_card(board_id: int, payload: CardMoveIn, background_tasks: BackgroundTasks):
     session = get_session()
     try:
-        entries = session.query(ChangeLog).order_by(desc(ChangeLog.created_at)).all()
-        return [
-            {
-                "id": e.id,
-                "action": e.action,
-                "entity_type": e.entity_type,
-                "entity_id": e.entity_id,
-                "before_json": json.loads(e.before_json) if e.before_json else None,
-                "after_json": json.loads(e.after_json) if e.after_json else None,
-                "evidence": e.evidence,
-                "source": e.source,
-                "created_at": e.created_at.isoformat(),
-            }
-            for e in entries
-        ]
+        card = (
+            session.query(BoardCard)
+            .filter(BoardCard.id == payload.card_id, BoardCard.board_id == board_id)
+            .first()
+        )
+        if not card:
+            raise HTTPException(status_code=404, detail="Card not found")
+        column = (
+            session.query(BoardColumn)
+            .filter(BoardColumn.id == payload.column_id, BoardColumn.board_id == board_id)
+            .first()
+        )
+        if not column:
+            raise HTTPException(status_code=404, detail="Column not found")
+        try:
+            rank = place_card(session, card, column.id, payload.after_card_id, payload.before_card_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        session.flush()
+        delta = _card_dict(card)
+        session.commit()
+        broker.publish("card.moved", delta, board_ids=(board_id,))
+        if needs_rebalance(rank):
+            background_tasks.add_task(_rebalance_column_job, column.id)
+        return delta
     finally:
         session.close()
 
 
-@app.post("/api/change-log")
-def api_create_change_log(payload: ChangeLogIn):
-    session = get_session()
+def _change_log_dict(row, include_payload=True):
+    entry = {
+        "id": row["id"],
+        "action": row["action"],
+        "entity_type": row["entity_type"],
+        "entity_id": row["entity_id"],
+        "evidence": row["evidence"],
+        "source": row["source"],
+        "created_at": row["created_at"].isoformat(),
+    }
+    if include_payload:
+        entry["before_json"] = json.loads(row["before_json"]) if row["before_json"] else None
+        entry["after_json"] = json.loads(row["after_json"]) if row["after_json"] else None
+    return entry
+
+
+@app.get("/api/change-log")
+def api_change_log(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    entity_type: str | None = None,
+    entity_id: str | None = None,
+    source: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    include_payload: bool = True,
+    include_archived: bool = False,
+):
     try:
-        entry = ChangeLog(
-            action=payload.action,
-            entity_type=payload.entity_type,
-            entity_id=payload.entity_id,
-            before_json=json.dumps(payload.before_json)
-            if payload.before_json is not None
-            else None,
-            after_json=json.dumps(payload.after_json)
-            if payload.after_json is not None
-            else None,
-            evidence=payload.evidence,
-            source=payload.source,
-            created_at=datetime.utcnow(),
-        )
-        session.add(entry)
-        session.commit()
-        session.refresh(entry)
-        return {"id": entry.id}
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    q = ChangeLogQuery(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        source=source,
+        since=since,
+        until=until,
+        cursor=position,
+    )
 
-@app.delete("/api/boards/{board_id}")
-def api_delete_board(board_id: int):
     session = get_session()
     try:
-        board = session.query(Board).filter(Board.id == board_id).first()
-        if not board:
-            raise HTTPException(status_code=404, detail="Board not found")
-        session.query(BoardCard).filter(BoardCard.board_id == board_id).delete(synchronize_session=False)
-        session.query(BoardColumn).filter(BoardColumn.board_id == board_id).delete(synchronize_session=False)
-        session.query(Task).filter(Task.parent_board_id == board_id).update(
-            {Task.parent_board_id: None},
-            synchronize_session=False,
-        )
-        session.delete(board)
-        session.commit()
-        return {"status": "deleted"}
+        rows = query_live(session, q, limit + 1, include_payload)
     finally:
         session.close()
+    if include_archived:
+        rows.extend(query_archive(q, limit + 1, include_payload))
+        rows.sort(key=sort_key, reverse=True)
 
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return [_change_log_dict(r, include_payload) for r in rows]
 
-@app.get("/tasks", response_class=HTMLResponse)
-def tasks_view(
-    request: Request,
-    assignee_id: int | None = None,
-    status: str | None = None,
-    priority: str | None = None,
-):
-    session = get_session()
+
+def _change_log_scope(payload: ChangeLogIn):
+    # Scopes the delta like the entity's own events: a board, a task's board
+    # and people (from its before/after snapshots), or an employee. Derived
+    # from the payload alone so the append path stays free of DB reads.
     try:
-        q = session.query(Task)
-        if assignee_id:
-            q = q.filter(Task.assignee_id == assignee_id)
-        if status:
-            q = q.filter(Task.status == status)
-        if priority:
-            q = q.filter(Task.priority == priority)
-
-        tasks = q.order_by(desc(Task.updated_at)).limit(200).all()
-        employees = session.query(Employee).all()
-
-        return templates.TemplateResponse(
-            "tasks.html",
-            {
-                "request": request,
-                "tasks": tasks,
-                "employees": employees,
-                "selected_assignee": assignee_id,
-                "selected_status": status,
-                "selected_priority": priority,
-            },
-        )
-    finally:
-        session.close()
+        key = int(payload.entity_id)
+    except (TypeError, ValueError):
+        return {}
+    if payload.entity_type == "board":
+        return {"board_ids": (key,)}
+    if payload.entity_type == "employee":
+        return {"employee_ids": (key,)}
+    if payload.entity_type != "task":
+        return {}
+    tasks = [t for t in (payload.before_json, payload.after_json) if t is not None]
+    return _task_scope(*({k: t.get(k) for k in ("parent_board_id", "assignee_id", "reporter_id")} for t in tasks))
+
+
+@app.post("/api/change-log")
+async def api_create_change_log(payload: ChangeLogIn):
+    row = {
+        "action": payload.action,
+        "entity_type": payload.entity_type,
+        "entity_id": payload.entity_id,
+        "before_json": json.dumps(payload.before_json) if payload.before_json is not None else None,
+        "after_json": json.dumps(payload.after_json) if payload.after_json is not None else None,
+        "evidence": payload.evidence,
+        "source": payload.source,
+        "created_at": datetime.utcnow(),
+    }
+    entry_id = await asyncio.wrap_future(change_log_writer.submit(row))
+    broker.publish(
+        "change_log.created",
+        {
+            "id": entry_id,
+            "action": row["action"],
+            "entity_type": row["entity_type"],
+            "entity_id": row["entity_id"],
+            "source": row["source"],
+            "created_at": row["created_at"].isoformat(),
+        },
+        **_change_log_scope(payload),
+    )
+    return {"id": entry_id}
 
 
-@app.get("/boards/{board_id}", response_class=HTMLResponse)
-def board_view(request: Request, board_id: int):
+@app.delete("/api/boards/{board_id}")
+def api_delete_board(board_id: int):
     session = get_session()
     try:
-        board = session.query(Board).filter(Board.id == board_id).first()
-        if not board:
-            return HTMLResponse("Board not found", status_code=404)
+        if not delete_board(session, board_id):
+            session.rollback()
+            raise HTTPException(status_code=404, detail="Board not found")
+        session.commit()
+        broker.publish("board.deleted", {"id": board_id}, board_ids=(board_id,))
+        return {"status": "deleted"}
+    finally:
+        session.close()
 
-        columns = (
-            session.query(BoardColumn)
-            .filter(BoardColumn.board_id == board_id)
-            .order_by(BoardColumn.order_index)
-            .all()
-        )
-        cards = (
-            session.query(BoardCard)
-            .filter(BoardCard.board_id == board_id)
-            .order_by(BoardCard.order_index)
-            .all()
-        )
-        tasks = {t.id: t for t in session.query(Task).all()}
-
-        columns_data = []
-        for c in columns:
-            col_cards = [cd for cd in cards if cd.column_id == c.id]
-            columns_data.append(
-                {
-                    "id": c.id,
-                    "name": c.name,
-                    "cards": [
-                        {
-                            "task": tasks.get(cd.task_id),
-                            "order_index": cd.order_index,
-                        }
-                        for cd in col_cards
-                    ],
-                }
-            )
 
-        return templates.TemplateResponse(
-            "board.html",
-            {
-                "request": request,
-                "board": board,
-                "columns": columns_data,
-            },
-        )
+@app.get("/api/stream")
+async def api_stream(request: Request, board_id: int | None = None, employee_id: int | None = None):
+    subscriber = broker.subscribe(board_id=board_id, employee_id=employee_id)
+
+    async def event_source():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                event = await subscriber.next_event()
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/api/ws")
+async def api_ws(websocket: WebSocket, board_id: int | None = None, employee_id: int | None = None):
+    await websocket.accept()
+    subscriber = broker.subscribe(board_id=board_id, employee_id=employee_id)
+    try:
+        while True:
+            event = await subscriber.next_event()
+            if event is None:
+                await websocket.send_text(json.dumps({"type": "heartbeat"}))
+                continue
+            await websocket.send_text(event_json(event))
+    except WebSocketDisconnect:
+        pass
     finally:
-        session.close()
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,338 @@
+import atexit
+import base64
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, delete, insert, or_, select
+
+from .db import DATA_DIR, SessionLocal
+from .models import ChangeLog
+
+
+ARCHIVE_DIR = DATA_DIR / "change_log_archive"
+MANIFEST_NAME = "manifest.json"
+
+SUMMARY_COLUMNS = [
+    ChangeLog.id,
+    ChangeLog.action,
+    ChangeLog.entity_type,
+    ChangeLog.entity_id,
+    ChangeLog.evidence,
+    ChangeLog.source,
+    ChangeLog.created_at,
+]
+PAYLOAD_COLUMNS = [ChangeLog.before_json, ChangeLog.after_json]
+
+
+@dataclass
+class ChangeLogQuery:
+    entity_type: str | None = None
+    entity_id: str | None = None
+    source: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    cursor: tuple[datetime, int] | None = None
+
+    def __post_init__(self):
+        # created_at is stored (and archived) as naive UTC; aware bounds
+        # would not compare with archived rows.
+        self.since = _naive_utc(self.since)
+        self.until = _naive_utc(self.until)
+
+
+def _naive_utc(ts):
+    if ts is not None and ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, entry_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
+def sort_key(row):
+    return row["created_at"], row["id"]
+
+
+def query_live(session, q: ChangeLogQuery, limit, include_payload=True):
+    columns = SUMMARY_COLUMNS + (PAYLOAD_COLUMNS if include_payload else [])
+    stmt = select(*columns)
+    if q.entity_type:
+        stmt = stmt.where(ChangeLog.entity_type == q.entity_type)
+    if q.entity_id:
+        stmt = stmt.where(ChangeLog.entity_id == q.entity_id)
+    if q.source:
+        stmt = stmt.where(ChangeLog.source == q.source)
+    if q.since:
+        stmt = stmt.where(ChangeLog.created_at >= q.since)
+    if q.until:
+        stmt = stmt.where(ChangeLog.created_at < q.until)
+    if q.cursor:
+        created_at, entry_id = q.cursor
+        stmt = stmt.where(
+            or_(
+                ChangeLog.created_at < created_at,
+                and_(ChangeLog.created_at == created_at, ChangeLog.id < entry_id),
+            )
+        )
+    stmt = stmt.order_by(ChangeLog.created_at.desc(), ChangeLog.id.desc()).limit(limit)
+    return [dict(r._mapping) for r in session.execute(stmt)]
+
+
+def _row_matches(row, q: ChangeLogQuery):
+    if q.entity_type and row["entity_type"] != q.entity_type:
+        return False
+    if q.entity_id and row["entity_id"] != q.entity_id:
+        return False
+    if q.source and row["source"] != q.source:
+        return False
+    if q.since and row["created_at"] < q.since:
+        return False
+    if q.until and row["created_at"] >= q.until:
+        return False
+    if q.cursor and sort_key(row) >= q.cursor:
+        return False
+    return True
+
+
+def _segment_bounds(segment):
+    low = (datetime.fromisoformat(segment["min_created_at"]), segment["min_id"])
+    high = (datetime.fromisoformat(segment["max_created_at"]), segment["max_id"])
+    return low, high
+
+
+def load_manifest(archive_dir=ARCHIVE_DIR):
+    path = archive_dir / MANIFEST_NAME
+    if not path.exists():
+        return {"segments": []}
+    with path.open("r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def _save_manifest(manifest, archive_dir):
+    path = archive_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=2)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp, path)
+
+
+def read_segment(segment, archive_dir=ARCHIVE_DIR):
+    with gzip.open(archive_dir / segment["file"], "rt", encoding="utf-8") as fp:
+        for line in fp:
+            row = json.loads(line)
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+            yield row
+
+
+def query_archive(q: ChangeLogQuery, limit, include_payload=True, archive_dir=ARCHIVE_DIR):
+    segments = [s for s in load_manifest(archive_dir)["segments"] if s["committed"]]
+    segments.sort(key=lambda s: _segment_bounds(s)[1], reverse=True)
+
+    rows = []
+    for segment in segments:
+        low, high = _segment_bounds(segment)
+        if len(rows) >= limit and sort_key(rows[limit - 1]) > high:
+            break
+        if q.since and high[0] < q.since:
+            continue
+        if q.until and low[0] >= q.until:
+            continue
+        if q.cursor and low >= q.cursor:
+            continue
+        if q.entity_type and q.entity_type not in segment["entity_types"]:
+            continue
+        if q.source and q.source not in segment["sources"]:
+            continue
+        rows.extend(r for r in read_segment(segment, archive_dir) if _row_matches(r, q))
+        rows.sort(key=sort_key, reverse=True)
+        del rows[limit:]
+
+    if not include_payload:
+        for row in rows:
+            row.pop("before_json", None)
+            row.pop("after_json", None)
+    return rows
+
+
+def _write_segment(rows, archive_dir):
+    name = f"segment-{rows[0]['id']:012d}-{rows[-1]['id']:012d}.jsonl.gz"
+    tmp = archive_dir / (name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as fp:
+        for row in rows:
+            fp.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+    with tmp.open("rb") as fp:
+        os.fsync(fp.fileno())
+    os.replace(tmp, archive_dir / name)
+    return {
+        "file": name,
+        "count": len(rows),
+        "min_id": min(r["id"] for r in rows),
+        "max_id": max(r["id"] for r in rows),
+        "min_created_at": rows[0]["created_at"].isoformat(),
+        "max_created_at": rows[-1]["created_at"].isoformat(),
+        "entity_types": sorted({r["entity_type"] for r in rows}),
+        "sources": sorted({r["source"] for r in rows}),
+        "committed": False,
+    }
+
+
+def _finish_pending(session, manifest, archive_dir):
+    # A segment is written before its rows are deleted; if a previous run died
+    # in between, drop the rows that are already safely archived.
+    for segment in manifest["segments"]:
+        if segment["committed"]:
+            continue
+        ids = [r["id"] for r in read_segment(segment, archive_dir)]
+        session.execute(delete(ChangeLog).where(ChangeLog.id.in_(ids)))
+        session.commit()
+        segment["committed"] = True
+        _save_manifest(manifest, archive_dir)
+
+
+def archive_change_log(session, older_than: datetime, batch_size=5000, archive_dir=ARCHIVE_DIR):
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(archive_dir)
+    _finish_pending(session, manifest, archive_dir)
+
+    archived = 0
+    while True:
+        stmt = (
+            select(*SUMMARY_COLUMNS, *PAYLOAD_COLUMNS)
+            .where(ChangeLog.created_at < older_than)
+            .order_by(ChangeLog.created_at, ChangeLog.id)
+            .limit(batch_size)
+        )
+        rows = [dict(r._mapping) for r in session.execute(stmt)]
+        if not rows:
+            break
+        segment = _write_segment(rows, archive_dir)
+        manifest["segments"].append(segment)
+        _save_manifest(manifest, archive_dir)
+
+        session.execute(delete(ChangeLog).where(ChangeLog.id.in_([r["id"] for r in rows])))
+        session.commit()
+        segment["committed"] = True
+        _save_manifest(manifest, archive_dir)
+        archived += len(rows)
+    return archived
+
+
+_STOP = object()
+
+
+# Append-only writer: entries submitted within `window` seconds of the first
+# queued one (up to `max_batch`) are inserted in a single transaction, and each
+# caller gets a future that resolves to its row id once the batch commits.
+class ChangeLogWriter:
+    def __init__(self, session_factory=SessionLocal, window=0.005, max_batch=500):
+        self._session_factory = session_factory
+        self._window = window
+        self._max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, row) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Change log writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="change-log-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((row, future))
+        return future
+
+    def write(self, row, timeout=30):
+        return self.submit(row).result(timeout=timeout)
+
+    def close(self, timeout=30):
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            # Still flushing: stay closed so no second writer can start, and
+            # let a later close() wait for it again.
+            raise RuntimeError(f"Change log writer did not stop within {timeout}s")
+        with self._lock:
+            # Later submissions (e.g. a new app lifespan) start a fresh writer thread.
+            if self._thread is thread:
+                self._thread = None
+                self._closed = False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self._window
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _insert(self, rows):
+        session = self._session_factory()
+        try:
+            stmt = insert(ChangeLog).returning(ChangeLog.id, sort_by_parameter_order=True)
+            ids = session.execute(stmt, rows).scalars().all()
+            session.commit()
+            return ids
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _flush(self, batch):
+        try:
+            ids = self._insert([row for row, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # Retry entries one by one so a single bad row does not fail the rest.
+            for entry in batch:
+                self._flush([entry])
+            return
+        for (_, future), entry_id in zip(batch, ids):
+            future.set_result(entry_id)
+
+
+change_log_writer = ChangeLogWriter()
+atexit.register(change_log_writer.close)
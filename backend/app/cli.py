@@ -1,87 +1,366 @@
 import argparse
-from collections import defaultdict
-from sqlalchemy import desc
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import aliased, sessionmaker
 
-from .db import SessionLocal
+from .db import SessionLocal, make_engine
 from .models import Employee, CommEdge, Task
 from .graph import graph_summary
+from .changelog import archive_change_log
+from .expertise import rebuild_expertise
+from .hierarchy import rebuild_closure
+from .retention import compact_comm_events, enable_incremental_vacuum
+from .parquet_export import DEFAULT_DIR as PARQUET_DIR, TABLES as PARQUET_TABLES, export_parquet
+from . import querywatch
 
 
-def graph_summary_cmd():
-    session = SessionLocal()
+def open_session(db_url=None):
+    if not db_url:
+        return SessionLocal()
+    return sessionmaker(bind=make_engine(db_url), autoflush=False, future=True)()
+
+
+def graph_summary_data(session, top_edges=15, top_contacts=5):
+    summary = graph_summary(session)
+
+    sender = aliased(Employee)
+    receiver = aliased(Employee)
+    edges = session.execute(
+        select(
+            sender.full_name,
+            receiver.full_name,
+            CommEdge.channel,
+            CommEdge.capacity,
+            CommEdge.weight,
+            CommEdge.message_count_30d,
+        )
+        .join(sender, sender.id == CommEdge.from_employee_id)
+        .join(receiver, receiver.id == CommEdge.to_employee_id)
+        .order_by(desc(CommEdge.weight))
+        .limit(top_edges)
+    ).all()
+
+    scores = (
+        select(
+            sender.role.label("role"),
+            CommEdge.to_employee_id.label("contact_id"),
+            func.sum(CommEdge.weight).label("score"),
+        )
+        .join(sender, sender.id == CommEdge.from_employee_id)
+        .group_by(sender.role, CommEdge.to_employee_id)
+        .subquery()
+    )
+    ranked = select(
+        scores.c.role,
+        scores.c.contact_id,
+        scores.c.score,
+        func.row_number()
+        .over(partition_by=scores.c.role, order_by=(scores.c.score.desc(), scores.c.contact_id))
+        .label("position"),
+    ).subquery()
+    contact = aliased(Employee)
+    rows = session.execute(
+        select(ranked.c.role, contact.full_name, ranked.c.score)
+        .join(contact, contact.id == ranked.c.contact_id)
+        .where(ranked.c.position <= top_contacts)
+        .order_by(ranked.c.role, ranked.c.position)
+    ).all()
+
+    roles = session.execute(select(Employee.role).distinct().order_by(Employee.role)).scalars().all()
+    contacts_by_role = {role: [] for role in roles}
+    for role, name, score in rows:
+        contacts_by_role.setdefault(role, []).append({"name": name, "score": round(score, 3)})
+
+    return {
+        "nodes": summary["nodes"],
+        "edges": summary["edges"],
+        "top_edges": [
+            {
+                "from": from_name,
+                "to": to_name,
+                "channel": channel,
+                "capacity": capacity,
+                "weight": weight,
+                "message_count_30d": msgs,
+            }
+            for from_name, to_name, channel, capacity, weight, msgs in edges
+        ],
+        "top_contacts_by_role": contacts_by_role,
+    }
+
+
+def print_graph_summary(data):
+    print(f"Graph nodes: {data['nodes']} edges: {data['edges']}")
+    print("Top 15 edges by weight:")
+    for e in data["top_edges"]:
+        print(
+            f"- {e['from']} -> {e['to']} "
+            f"{e['channel']}/{e['capacity']} weight={e['weight']:.2f} msgs={e['message_count_30d']}"
+        )
+
+    print("\nTop 5 contacts per role:")
+    for role, contacts in data["top_contacts_by_role"].items():
+        print(f"- {role}: " + ", ".join(f"{c['name']} ({c['score']:.2f})" for c in contacts))
+
+
+def tasks_summary_data(session, top_urgent=10):
+    role = func.coalesce(Employee.role, "Unknown")
+    open_counts = session.execute(
+        select(role, func.count(Task.id))
+        .outerjoin(Employee, Employee.id == Task.assignee_id)
+        .where(Task.status != "done", Task.assignee_id.isnot(None))
+        .group_by(role)
+        .order_by(role)
+    ).all()
+
+    urgent = session.execute(
+        select(Task.title, func.coalesce(Employee.full_name, "Unassigned"), Task.status)
+        .outerjoin(Employee, Employee.id == Task.assignee_id)
+        .where(Task.priority == "urgent")
+        .order_by(desc(Task.updated_at))
+        .limit(top_urgent)
+    ).all()
+
+    return {
+        "open_tasks_by_role": {r: count for r, count in open_counts},
+        "urgent_tasks": [
+            {"title": title, "assignee": assignee, "status": status}
+            for title, assignee, status in urgent
+        ],
+    }
+
+
+def print_tasks_summary(data):
+    print("Open tasks per role:")
+    for role, count in data["open_tasks_by_role"].items():
+        print(f"- {role}: {count}")
+
+    print("\nTop urgent tasks:")
+    for t in data["urgent_tasks"]:
+        print(f"- {t['title']} ({t['assignee']}) status={t['status']}")
+
+
+def graph_summary_cmd(db_url=None, output="table"):
+    session = open_session(db_url)
+    try:
+        data = graph_summary_data(session)
+    finally:
+        session.close()
+    if output == "json":
+        print(json.dumps(data, indent=2))
+    else:
+        print_graph_summary(data)
+
+
+def tasks_summary(db_url=None, output="table"):
+    session = open_session(db_url)
+    try:
+        data = tasks_summary_data(session)
+    finally:
+        session.close()
+    if output == "json":
+        print(json.dumps(data, indent=2))
+    else:
+        print_tasks_summary(data)
+
+
+def archive_change_log_cmd(older_than_days, batch_size, db_url=None):
+    session = open_session(db_url)
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        archived = archive_change_log(session, cutoff, batch_size=batch_size)
+        print(f"Archived {archived} change log entries older than {cutoff.isoformat()}")
+    finally:
+        session.close()
+
+
+def rebuild_expertise_cmd(db_url=None):
+    session = open_session(db_url)
     try:
-        summary = graph_summary(session)
-        print(f"Graph nodes: {summary['nodes']} edges: {summary['edges']}")
-        print("Top 15 edges by weight:")
-        edges = session.query(CommEdge).order_by(desc(CommEdge.weight)).limit(15).all()
-        for e in edges:
-            print(
-                f"- {e.from_employee.full_name} -> {e.to_employee.full_name} "
-                f"{e.channel}/{e.capacity} weight={e.weight:.2f} msgs={e.message_count_30d}"
-            )
-
-        print("\nTop 5 contacts per role:")
-        employees = session.query(Employee).all()
-        role_groups = defaultdict(list)
-        for e in employees:
-            role_groups[e.role].append(e.id)
-
-        for role, ids in role_groups.items():
-            contact_scores = defaultdict(float)
-            edges = session.query(CommEdge).filter(CommEdge.from_employee_id.in_(ids)).all()
-            for e in edges:
-                contact_scores[e.to_employee_id] += e.weight
-            top = sorted(contact_scores.items(), key=lambda x: x[1], reverse=True)[:5]
-            names = []
-            for emp_id, score in top:
-                emp = session.query(Employee).filter(Employee.id == emp_id).first()
-                if emp:
-                    names.append(f"{emp.full_name} ({score:.2f})")
-            print(f"- {role}: " + ", ".join(names))
+        pairs = rebuild_expertise(session)
+        session.commit()
     finally:
         session.close()
+    print(f"Rebuilt topic expertise for {pairs} (topic, employee) pairs")
+
+
+def compact_comm_events_cmd(
+    older_than_days, batch_size, archive, vacuum_every, incremental_vacuum, db_url=None
+):
+    session = open_session(db_url)
+    try:
+        if incremental_vacuum and enable_incremental_vacuum(session):
+            print("Switched SQLite to auto_vacuum=INCREMENTAL")
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        compacted = compact_comm_events(
+            session,
+            cutoff,
+            batch_size=batch_size,
+            archive=archive,
+            vacuum_every=vacuum_every,
+        )
+        print(f"Compacted {compacted} comm events older than {cutoff.isoformat()} into daily rollups")
+    finally:
+        session.close()
+
+
+def _month_arg(value):
+    try:
+        return datetime.strptime(value, "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {value!r}")
 
 
-def tasks_summary():
-    session = SessionLocal()
+def export_parquet_cmd(out, tables, since, chunk_size, db_url=None):
+    session = open_session(db_url)
     try:
-        print("Open tasks per role:")
-        employees = session.query(Employee).all()
-        role_by_id = {e.id: e.role for e in employees}
-        counts = defaultdict(int)
-        tasks = session.query(Task).filter(Task.status != "done").all()
-        for t in tasks:
-            if t.assignee_id:
-                counts[role_by_id.get(t.assignee_id, "Unknown")] += 1
-        for role, count in counts.items():
-            print(f"- {role}: {count}")
-
-        print("\nTop urgent tasks:")
-        urgent = (
-            session.query(Task)
-            .filter(Task.priority == "urgent")
-            .order_by(desc(Task.updated_at))
-            .limit(10)
-            .all()
+        since_dt = datetime.strptime(since, "%Y-%m") if since else None
+        results = export_parquet(session, Path(out), tables=tables, since=since_dt, chunk_size=chunk_size)
+    finally:
+        session.close()
+    for table, result in results.items():
+        months = result["months"]
+        if months is None:
+            print(f"{table}: {result['rows']} rows (full snapshot)")
+            continue
+        span = f"{months[0]}..{months[-1]}" if months else "no months"
+        print(f"{table}: {result['rows']} rows in {len(months)} monthly partitions ({span})")
+
+
+def analytics_cmd(args):
+    from . import analytics  # needs pyarrow
+
+    root = Path(args.root)
+    if args.report == "topic-trends":
+        rows = analytics.topic_trends(root, args.since, args.until, topics=args.topic)
+    elif args.report == "topic-movers":
+        rows = analytics.topic_movers(root, month=args.until, previous=args.since, limit=args.limit or 10)
+    elif args.report == "team-volume":
+        rows = analytics.team_volume(
+            root, args.since, args.until, cross_team_only=args.cross_team_only, limit=args.limit
         )
-        for t in urgent:
-            assignee = t.assignee.full_name if t.assignee else "Unassigned"
-            print(f"- {t.title} ({assignee}) status={t.status}")
+    else:
+        rows = analytics.channel_mix(root, args.since, args.until)
+    if args.format == "json":
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print("No data (run export-parquet first)")
+        return
+    columns = list(rows[0])
+    widths = [max(len(c), *(len(str(r[c])) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+def rebuild_org_closure_cmd(db_url=None):
+    session = open_session(db_url)
+    try:
+        rows = rebuild_closure(session)
+        session.commit()
     finally:
         session.close()
+    print(f"Rebuilt org closure table with {rows} rows")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Org CLI")
+    db_opts = argparse.ArgumentParser(add_help=False)
+    db_opts.add_argument("--db", help="SQLAlchemy/Postgres URL (defaults to DATABASE_URL or the local SQLite DB)")
+    db_opts.add_argument(
+        "--query-budget",
+        type=int,
+        default=querywatch.QUERY_BUDGET,
+        help="Track SQL statements and fail if the command runs more than this many",
+    )
+    format_opts = argparse.ArgumentParser(add_help=False)
+    format_opts.add_argument("--format", choices=["table", "json"], default="table")
+
     sub = parser.add_subparsers(dest="cmd", required=True)
-    sub.add_parser("graph-summary")
-    sub.add_parser("tasks-summary")
+    sub.add_parser("graph-summary", parents=[db_opts, format_opts])
+    sub.add_parser("tasks-summary", parents=[db_opts, format_opts])
+    archive = sub.add_parser("archive-change-log", parents=[db_opts])
+    archive.add_argument("--older-than-days", type=int, default=90)
+    archive.add_argument("--batch-size", type=int, default=5000)
+    sub.add_parser("rebuild-expertise", parents=[db_opts])
+    sub.add_parser("rebuild-org-closure", parents=[db_opts])
+    compact = sub.add_parser("compact-comm-events", parents=[db_opts])
+    compact.add_argument("--older-than-days", type=int, default=90)
+    compact.add_argument("--batch-size", type=int, default=5000)
+    compact.add_argument("--archive", action="store_true", help="Keep raw rows as gzip JSONL segments")
+    compact.add_argument("--vacuum-every", type=int, default=20, help="Reclaim space every N batches (0 = only at the end)")
+    compact.add_argument(
+        "--incremental-vacuum",
+        action="store_true",
+        help="SQLite: switch to auto_vacuum=INCREMENTAL first (one full VACUUM)",
+    )
+    export = sub.add_parser("export-parquet", parents=[db_opts])
+    export.add_argument("--out", default=str(PARQUET_DIR))
+    export.add_argument(
+        "--tables",
+        type=lambda v: [t.strip() for t in v.split(",") if t.strip()],
+        default=list(PARQUET_TABLES),
+        help=f"Comma-separated subset of {','.join(PARQUET_TABLES)}",
+    )
+    export.add_argument("--since", type=_month_arg, help="Only rewrite partitions from this month (YYYY-MM) on")
+    export.add_argument("--chunk-size", type=int, default=100_000)
+    report = sub.add_parser("analytics", parents=[format_opts], help="Trend reports over the Parquet export")
+    report.add_argument("report", choices=["topic-trends", "topic-movers", "team-volume", "channel-mix"])
+    report.add_argument("--root", default=str(PARQUET_DIR))
+    report.add_argument("--since", type=_month_arg, help="First month (YYYY-MM); previous month for topic-movers")
+    report.add_argument("--until", type=_month_arg, help="Last month (YYYY-MM); compared month for topic-movers")
+    report.add_argument("--topic", action="append", help="Restrict topic-trends to these topics (repeatable)")
+    report.add_argument("--cross-team-only", action="store_true")
+    report.add_argument("--limit", type=int)
+    report.set_defaults(query_budget=None)
     args = parser.parse_args()
 
+    if args.cmd == "export-parquet":
+        unknown = sorted(set(args.tables) - set(PARQUET_TABLES))
+        if unknown:
+            parser.error(f"unknown tables: {', '.join(unknown)}")
+
+    if not querywatch.ENABLED and args.query_budget is None:
+        run_command(args)
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    querywatch.install()
+    try:
+        with querywatch.track_queries(f"cli {args.cmd}", budget=args.query_budget):
+            run_command(args)
+    except querywatch.QueryBudgetExceeded as exc:
+        raise SystemExit(str(exc))
+
+
+def run_command(args):
     if args.cmd == "graph-summary":
-        graph_summary_cmd()
+        graph_summary_cmd(args.db, args.format)
     elif args.cmd == "tasks-summary":
-        tasks_summary()
+        tasks_summary(args.db, args.format)
+    elif args.cmd == "archive-change-log":
+        archive_change_log_cmd(args.older_than_days, args.batch_size, args.db)
+    elif args.cmd == "rebuild-expertise":
+        rebuild_expertise_cmd(args.db)
+    elif args.cmd == "rebuild-org-closure":
+        rebuild_org_closure_cmd(args.db)
+    elif args.cmd == "export-parquet":
+        export_parquet_cmd(args.out, args.tables, args.since, args.chunk_size, args.db)
+    elif args.cmd == "analytics":
+        analytics_cmd(args)
+    elif args.cmd == "compact-comm-events":
+        compact_comm_events_cmd(
+            args.older_than_days,
+            args.batch_size,
+            args.archive,
+            args.vacuum_every,
+            args.incremental_vacuum,
+            args.db,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional: only speeds up degree aggregation
+    np = None
+
+
+# Array-backed graph: nodes are dense integer indices with per-attribute
+# columns, edges are parallel src/dst/weight arrays (8 bytes per value)
+# instead of NetworkX's nested dicts. Parallel edges are allowed.
+class CompactGraph:
+    def __init__(self, directed=True, multigraph=False):
+        self.directed = directed
+        self.multigraph = multigraph
+        self.node_keys = []
+        self.node_index = {}
+        self.node_attrs = {}
+        self.src = array("q")
+        self.dst = array("q")
+        self.weight = array("d")
+        self.edge_attrs = {}
+
+    def add_node(self, key, **attrs):
+        idx = self.node_index.get(key)
+        if idx is None:
+            idx = len(self.node_keys)
+            self.node_index[key] = idx
+            self.node_keys.append(key)
+            for column in self.node_attrs.values():
+                column.append(None)
+        for name, value in attrs.items():
+            column = self.node_attrs.get(name)
+            if column is None:
+                column = self.node_attrs[name] = [None] * len(self.node_keys)
+            column[idx] = value
+        return idx
+
+    def add_edge(self, u, v, weight=1.0, **attrs):
+        src = self.node_index.get(u)
+        if src is None:
+            src = self.add_node(u)
+        dst = self.node_index.get(v)
+        if dst is None:
+            dst = self.add_node(v)
+        self.src.append(src)
+        self.dst.append(dst)
+        self.weight.append(weight)
+        position = len(self.weight) - 1
+        for name, value in attrs.items():
+            column = self.edge_attrs.get(name)
+            if column is None:
+                column = self.edge_attrs[name] = _edge_column(value, position)
+            column.append(value)
+        for name, column in self.edge_attrs.items():
+            if len(column) <= position:
+                column.append(_missing(column))
+        return position
+
+    def number_of_nodes(self):
+        return len(self.node_keys)
+
+    def number_of_edges(self):
+        return len(self.weight)
+
+    def node_data(self, idx):
+        return {name: column[idx] for name, column in self.node_attrs.items() if column[idx] is not None}
+
+    def nodes(self, data=False):
+        for idx, key in enumerate(self.node_keys):
+            yield (key, self.node_data(idx)) if data else key
+
+    def edges(self, data=False):
+        keys = self.node_keys
+        names = list(self.edge_attrs)
+        columns = [self.edge_attrs[n] for n in names]
+        for i in range(len(self.weight)):
+            u, v = keys[self.src[i]], keys[self.dst[i]]
+            if data:
+                attrs = {"weight": self.weight[i]}
+                attrs.update(zip(names, (c[i] for c in columns)))
+                yield u, v, attrs
+            else:
+                yield u, v
+
+    def _degree(self, endpoints):
+        n = len(self.node_keys)
+        if np is not None:
+            totals = np.bincount(
+                np.frombuffer(endpoints, dtype=np.int64),
+                weights=np.frombuffer(self.weight, dtype=np.float64),
+                minlength=n,
+            )
+            return dict(zip(self.node_keys, totals.tolist()))
+        totals = [0.0] * n
+        for idx, w in zip(endpoints, self.weight):
+            totals[idx] += w
+        return dict(zip(self.node_keys, totals))
+
+    def out_degree(self):
+        return self._degree(self.src)
+
+    def in_degree(self):
+        return self._degree(self.dst)
+
+    def to_networkx(self):
+        import networkx as nx
+
+        if self.multigraph:
+            G = nx.MultiDiGraph() if self.directed else nx.MultiGraph()
+        else:
+            G = nx.DiGraph() if self.directed else nx.Graph()
+        G.add_nodes_from(self.nodes(data=True))
+        G.add_edges_from(self.edges(data=True))
+        return G
+
+    def nbytes(self):
+        arrays = [self.src, self.dst, self.weight] + [
+            c for c in self.edge_attrs.values() if isinstance(c, array)
+        ]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+def _edge_column(value, length):
+    # Numeric attributes get their own typed array; anything else a list.
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return [None] * length
+    column = array("q" if isinstance(value, int) else "d")
+    column.extend([0] * length)
+    return column
+
+
+def _missing(column):
+    return 0 if isinstance(column, array) else None
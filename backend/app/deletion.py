@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from sqlalchemy import delete, exists, or_, select, update
+
+from . import hierarchy
+from .expertise import forget_employee
+from .models import (
+    Board,
+    BoardCard,
+    BoardColumn,
+    CommDailyRollup,
+    CommEdge,
+    CommEvent,
+    Decision,
+    Employee,
+    Task,
+)
+
+
+# Explicit bulk statements rather than ON DELETE rules: existing SQLite
+# databases cannot gain FK actions without a table rebuild, and SQLite only
+# enforces them with PRAGMA foreign_keys on. Each cascade runs inside the
+# caller's transaction.
+
+
+class DeletionConflict(Exception):
+    pass
+
+
+def _bulk(session, stmt):
+    return session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def reassign_work(session, employee_id, target_id):
+    # Tasks, boards and decisions move to target_id; without one, assignments
+    # are cleared, but tasks they reported and boards they own need an owner.
+    if target_id is None:
+        blocking = session.execute(
+            select(
+                exists().where(Task.reporter_id == employee_id),
+                exists().where(Board.owner_id == employee_id),
+            )
+        ).one()
+        if any(blocking):
+            raise DeletionConflict("Employee reports tasks or owns boards; pass reassign_to")
+    return {
+        "tasks_reassigned": _bulk(
+            session, update(Task).where(Task.assignee_id == employee_id).values(assignee_id=target_id)
+        ),
+        "tasks_reporter_reassigned": _bulk(
+            session, update(Task).where(Task.reporter_id == employee_id).values(reporter_id=target_id)
+        ),
+        "boards_reassigned": _bulk(
+            session, update(Board).where(Board.owner_id == employee_id).values(owner_id=target_id)
+        ),
+        "decisions_reassigned": _bulk(
+            session, update(Decision).where(Decision.owner_id == employee_id).values(owner_id=target_id)
+        ),
+    }
+
+
+def _touches(model, employee_id):
+    return or_(model.from_employee_id == employee_id, model.to_employee_id == employee_id)
+
+
+def delete_employee(session, employee_id, hard=True, reassign_to=None, now=None):
+    # Soft: reports move up to the manager, work is reassigned (to reassign_to,
+    # else the manager), derived rows (comm edges, expertise, closure) go and
+    # the row is marked deleted_at; comm events stay for history.
+    # Hard: additionally deletes their comm events and the employee row.
+    row = session.execute(
+        select(Employee.manager_id, Employee.deleted_at).where(Employee.id == employee_id)
+    ).first()
+    if row is None:
+        return None
+    manager_id, deleted_at = row
+    target_id = reassign_to if reassign_to is not None else manager_id
+    if target_id == employee_id:
+        raise DeletionConflict("Cannot reassign work to the employee being deleted")
+
+    counts = reassign_work(session, employee_id, target_id)
+    counts["reports_moved"] = hierarchy.remove_employee(session, employee_id)
+    counts["edges_deleted"] = _bulk(session, delete(CommEdge).where(_touches(CommEdge, employee_id)))
+    forget_employee(session, employee_id, purge_events=hard)
+    if hard:
+        counts["events_deleted"] = _bulk(session, delete(CommEvent).where(_touches(CommEvent, employee_id)))
+        counts["rollups_deleted"] = _bulk(
+            session, delete(CommDailyRollup).where(_touches(CommDailyRollup, employee_id))
+        )
+        _bulk(session, delete(Employee).where(Employee.id == employee_id))
+    elif deleted_at is None:
+        _bulk(
+            session,
+            update(Employee).where(Employee.id == employee_id).values(deleted_at=now or datetime.utcnow()),
+        )
+    return counts
+
+
+def delete_board(session, board_id):
+    _bulk(session, delete(BoardCard).where(BoardCard.board_id == board_id))
+    _bulk(session, delete(BoardColumn).where(BoardColumn.board_id == board_id))
+    _bulk(session, update(Task).where(Task.parent_board_id == board_id).values(parent_board_id=None))
+    return _bulk(session, delete(Board).where(Board.id == board_id)) > 0
@@ -0,0 +1,298 @@
+import math
+import os
+from datetime import datetime, time, timedelta, timezone
+
+from sqlalchemy import bindparam, case, delete, func, insert, or_, select, update
+
+from .models import CommDailyRollup, CommEvent, Employee, ExpertiseEpoch, TopicCounterpart, TopicExpertise
+
+
+# Scores are stored relative to an epoch: each message adds
+# 2^((t - epoch) / half_life), so older messages never need rewriting and
+# ranking by the stored value equals ranking by the decayed value. The
+# current score is stored * 2^(-(now - epoch) / half_life). Doubles overflow
+# past ~1024 half-lives, so once a message lands more than REBASE_HALF_LIVES
+# after the epoch, the epoch moves up to it and every score is scaled down
+# by the same power of two, which changes neither rankings nor decayed values.
+DEFAULT_EPOCH = datetime(2020, 1, 1)
+HALF_LIFE_DAYS = float(os.getenv("EXPERTISE_HALF_LIFE_DAYS", "30"))
+if not math.isfinite(HALF_LIFE_DAYS) or HALF_LIFE_DAYS <= 0:
+    raise ValueError(f"EXPERTISE_HALF_LIFE_DAYS must be a positive number of days, got {HALF_LIFE_DAYS!r}")
+REBASE_HALF_LIVES = 64
+SENT_WEIGHT = 1.0
+RECEIVED_WEIGHT = 0.5
+SORT_COLUMNS = {
+    "score": TopicExpertise.score,
+    "sent": TopicExpertise.sent_count,
+    "received": TopicExpertise.received_count,
+    "counterparts": TopicExpertise.counterpart_count,
+}
+
+
+def _naive_utc(ts):
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _half_lives(ts, epoch):
+    return (_naive_utc(ts) - epoch).total_seconds() / (HALF_LIFE_DAYS * 86400)
+
+
+def epoch_weight(ts, epoch=DEFAULT_EPOCH):
+    return 2.0 ** _half_lives(ts, epoch)
+
+
+def decayed(score, epoch, now=None):
+    # Long idle periods just decay towards 0 instead of overflowing.
+    return score * 2.0 ** min(-_half_lives(now or datetime.utcnow(), epoch), 1000.0)
+
+
+def get_epoch(session, lock=False):
+    stmt = select(ExpertiseEpoch.epoch).where(ExpertiseEpoch.id == 1)
+    if lock:
+        # Postgres: writers share the row, a rebase takes it exclusively.
+        stmt = stmt.with_for_update(read=True)
+    return session.execute(stmt).scalar() or DEFAULT_EPOCH
+
+
+def _set_epoch(session, epoch):
+    stmt = _dialect_insert(session, ExpertiseEpoch).values(id=1, epoch=epoch)
+    session.execute(stmt.on_conflict_do_update(index_elements=["id"], set_={"epoch": epoch}))
+
+
+def _epoch_for(session, latest):
+    # The epoch to weight messages up to `latest` with, rebasing if needed.
+    epoch = get_epoch(session, lock=True)
+    shift = math.floor(_half_lives(latest, epoch))
+    if shift <= REBASE_HALF_LIVES:
+        return epoch
+    session.execute(
+        update(TopicExpertise)
+        .values(score=TopicExpertise.score * math.ldexp(1.0, -shift))
+        .execution_options(synchronize_session=False)
+    )
+    epoch += timedelta(days=shift * HALF_LIFE_DAYS)
+    _set_epoch(session, epoch)
+    return epoch
+
+
+def _dialect_insert(session, model):
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model)
+
+
+def _bump(session, topic, employee_id, counterpart_id, ts, epoch, sent):
+    new_counterpart = session.execute(
+        _dialect_insert(session, TopicCounterpart)
+        .values(topic=topic, employee_id=employee_id, counterpart_id=counterpart_id)
+        .on_conflict_do_nothing()
+    ).rowcount
+    stmt = _dialect_insert(session, TopicExpertise).values(
+        topic=topic,
+        employee_id=employee_id,
+        score=epoch_weight(ts, epoch) * (SENT_WEIGHT if sent else RECEIVED_WEIGHT),
+        sent_count=1 if sent else 0,
+        received_count=0 if sent else 1,
+        counterpart_count=1 if new_counterpart else 0,
+        last_at=ts,
+    )
+    excluded = stmt.excluded
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["topic", "employee_id"],
+            set_={
+                "score": TopicExpertise.score + excluded.score,
+                "sent_count": TopicExpertise.sent_count + excluded.sent_count,
+                "received_count": TopicExpertise.received_count + excluded.received_count,
+                "counterpart_count": TopicExpertise.counterpart_count + excluded.counterpart_count,
+                "last_at": case(
+                    (
+                        TopicExpertise.last_at.is_(None) | (excluded.last_at > TopicExpertise.last_at),
+                        excluded.last_at,
+                    ),
+                    else_=TopicExpertise.last_at,
+                ),
+            },
+        )
+    )
+
+
+def record_event(session, from_employee_id, to_employee_id, topic, timestamp):
+    # Runs inside the caller's transaction, so the index commits with the event.
+    ts = _naive_utc(timestamp)
+    epoch = _epoch_for(session, ts)
+    _bump(session, topic, from_employee_id, to_employee_id, ts, epoch, sent=True)
+    _bump(session, topic, to_employee_id, from_employee_id, ts, epoch, sent=False)
+
+
+def _messages(session, employee_id=None, chunk_size=50_000):
+    # Raw events plus the daily rollups retention compacted them into, as
+    # (topic, from, to, weighted_at, last_at, count). Rollups are weighted
+    # at midday, which is within ~1% of the per-message weights.
+    events = select(
+        CommEvent.topic, CommEvent.from_employee_id, CommEvent.to_employee_id, CommEvent.timestamp
+    )
+    rollups = select(
+        CommDailyRollup.topic,
+        CommDailyRollup.from_employee_id,
+        CommDailyRollup.to_employee_id,
+        CommDailyRollup.day,
+        CommDailyRollup.last_at,
+        CommDailyRollup.message_count,
+    )
+    if employee_id is not None:
+        events = events.where(
+            or_(CommEvent.from_employee_id == employee_id, CommEvent.to_employee_id == employee_id)
+        )
+        rollups = rollups.where(
+            or_(CommDailyRollup.from_employee_id == employee_id, CommDailyRollup.to_employee_id == employee_id)
+        )
+    for topic, from_id, to_id, ts in session.execute(events.execution_options(yield_per=chunk_size)):
+        yield topic, from_id, to_id, ts, ts, 1
+    for topic, from_id, to_id, day, last_at, count in session.execute(
+        rollups.execution_options(yield_per=chunk_size)
+    ):
+        yield topic, from_id, to_id, datetime.combine(day, time(12)), last_at, count
+
+
+def forget_employee(session, employee_id, purge_events=False):
+    # Drops the employee's own rows. With purge_events (their comm events are
+    # about to be deleted) their messages are also taken out of everyone
+    # else's rows, so the index still matches a rebuild. last_at is left as is.
+    # Covers their compacted daily rollups too.
+    if purge_events:
+        messages = list(_messages(session, employee_id))
+        epoch = _epoch_for(session, max((m[3] for m in messages), default=DEFAULT_EPOCH))
+        deltas = {}
+        for topic, from_id, to_id, ts, _, count in messages:
+            if from_id == to_id:
+                continue
+            other_sent = to_id == employee_id
+            other = from_id if other_sent else to_id
+            entry = deltas.get((topic, other))
+            if entry is None:
+                entry = deltas[(topic, other)] = [0.0, 0, 0]
+            entry[0] += count * epoch_weight(ts, epoch) * (SENT_WEIGHT if other_sent else RECEIVED_WEIGHT)
+            entry[1 if other_sent else 2] += count
+        if deltas:
+            table = TopicExpertise.__table__
+            session.connection().execute(
+                update(table)
+                .where(table.c.topic == bindparam("b_topic"), table.c.employee_id == bindparam("b_employee"))
+                .values(
+                    # Rounding can leave a hair below zero.
+                    score=case(
+                        (table.c.score > bindparam("b_score"), table.c.score - bindparam("b_score")),
+                        else_=0.0,
+                    ),
+                    sent_count=table.c.sent_count - bindparam("b_sent"),
+                    received_count=table.c.received_count - bindparam("b_received"),
+                    counterpart_count=table.c.counterpart_count - 1,
+                ),
+                [
+                    {"b_topic": t, "b_employee": e, "b_score": score, "b_sent": sent, "b_received": received}
+                    for (t, e), (score, sent, received) in deltas.items()
+                ],
+            )
+            session.execute(
+                delete(TopicExpertise).where(TopicExpertise.sent_count + TopicExpertise.received_count <= 0)
+            )
+        session.execute(delete(TopicCounterpart).where(TopicCounterpart.counterpart_id == employee_id))
+    session.execute(delete(TopicCounterpart).where(TopicCounterpart.employee_id == employee_id))
+    session.execute(delete(TopicExpertise).where(TopicExpertise.employee_id == employee_id))
+
+
+def rebuild_expertise(session, chunk_size=50_000):
+    session.execute(delete(TopicCounterpart))
+    session.execute(delete(TopicExpertise))
+    deleted = set(session.execute(select(Employee.id).where(Employee.deleted_at.isnot(None))).scalars())
+    # Measured from the newest message, so no weight exceeds 1 and nothing
+    # can overflow however long the history.
+    latest = [
+        session.execute(select(func.max(CommEvent.timestamp))).scalar(),
+        session.execute(select(func.max(CommDailyRollup.day))).scalar(),
+    ]
+    if latest[1] is not None:
+        latest[1] = datetime.combine(latest[1], time(12))
+    latest = [ts for ts in latest if ts is not None]
+    epoch = max(latest) if latest else get_epoch(session)
+    _set_epoch(session, epoch)
+
+    stats = {}
+    counterparts = {}
+    for topic, from_id, to_id, ts, last_at, count in _messages(session, chunk_size=chunk_size):
+        weight = count * epoch_weight(ts, epoch)
+        for employee_id, other, sent in ((from_id, to_id, True), (to_id, from_id, False)):
+            if employee_id in deleted:
+                continue
+            key = (topic, employee_id)
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = [0.0, 0, 0, last_at]
+                counterparts[key] = set()
+            entry[0] += weight * (SENT_WEIGHT if sent else RECEIVED_WEIGHT)
+            entry[1 if sent else 2] += count
+            if last_at > entry[3]:
+                entry[3] = last_at
+            counterparts[key].add(other)
+
+    batch = []
+    for (topic, employee_id), (score, sent, received, last_at) in stats.items():
+        batch.append(
+            {
+                "topic": topic,
+                "employee_id": employee_id,
+                "score": score,
+                "sent_count": sent,
+                "received_count": received,
+                "counterpart_count": len(counterparts[(topic, employee_id)]),
+                "last_at": last_at,
+            }
+        )
+        if len(batch) >= chunk_size:
+            session.execute(insert(TopicExpertise), batch)
+            batch = []
+    if batch:
+        session.execute(insert(TopicExpertise), batch)
+
+    batch = []
+    for (topic, employee_id), others in counterparts.items():
+        for other in others:
+            batch.append({"topic": topic, "employee_id": employee_id, "counterpart_id": other})
+            if len(batch) >= chunk_size:
+                session.execute(insert(TopicCounterpart), batch)
+                batch = []
+    if batch:
+        session.execute(insert(TopicCounterpart), batch)
+    return len(stats)
+
+
+def experts(session, topic, limit=10, sort="score"):
+    order = SORT_COLUMNS[sort]
+    rows = session.execute(
+        select(TopicExpertise, Employee.full_name, Employee.role, Employee.team)
+        .join(Employee, Employee.id == TopicExpertise.employee_id)
+        .where(TopicExpertise.topic == topic, Employee.deleted_at.is_(None))
+        .order_by(order.desc(), TopicExpertise.employee_id)
+        .limit(limit)
+    )
+    now = datetime.utcnow()
+    epoch = get_epoch(session)
+    return [
+        {
+            "employee_id": te.employee_id,
+            "name": name,
+            "role": role,
+            "team": team,
+            "score": round(decayed(te.score, epoch, now), 4),
+            "sent": te.sent_count,
+            "received": te.received_count,
+            "counterparts": te.counterpart_count,
+            "last_at": te.last_at.isoformat() if te.last_at else None,
+        }
+        for te, name, role, team in rows
+    ]
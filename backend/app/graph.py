@@ -1,60 +1,159 @@
 import json
 from collections import defaultdict
 
-import networkx as nx
+from sqlalchemy import JSON, cast, func, select, true
 
+from .compact_graph import CompactGraph
 from .models import Employee, CommEdge
 
 
-def build_comm_graph(session) -> nx.DiGraph:
-    G = nx.DiGraph()
-    employees = session.query(Employee).all()
-    for e in employees:
-        G.add_node(e.id, type="employee", name=e.full_name, role=e.role, team=e.team)
+def build_comm_graph(session) -> CompactGraph:
+    G = CompactGraph(directed=True)
+    employees = session.query(Employee.id, Employee.full_name, Employee.role, Employee.team).filter(
+        Employee.deleted_at.is_(None)
+    )
+    for emp_id, name, role, team in employees:
+        G.add_node(emp_id, type="employee", name=name, role=role, team=team)
 
-    edges = session.query(CommEdge).all()
-    for e in edges:
-        key = (e.from_employee_id, e.to_employee_id)
-        if G.has_edge(*key):
-            G[key[0]][key[1]]["weight"] += e.weight
-            G[key[0]][key[1]]["message_count_30d"] += e.message_count_30d
+    # Parallel comm edges (one per channel/capacity) collapse into one edge.
+    pairs = {}
+    edges = session.query(
+        CommEdge.from_employee_id,
+        CommEdge.to_employee_id,
+        CommEdge.weight,
+        CommEdge.message_count_30d,
+    )
+    for from_id, to_id, weight, count in edges:
+        entry = pairs.get((from_id, to_id))
+        if entry:
+            entry[0] += weight
+            entry[1] += count
         else:
-            G.add_edge(
-                key[0],
-                key[1],
-                weight=e.weight,
-                message_count_30d=e.message_count_30d,
-            )
+            pairs[(from_id, to_id)] = [weight, count]
+    for (from_id, to_id), (weight, count) in pairs.items():
+        G.add_edge(from_id, to_id, weight=weight, message_count_30d=count)
     return G
 
 
-def build_knowledge_graph(session) -> nx.MultiDiGraph:
-    G = nx.MultiDiGraph()
-    employees = session.query(Employee).all()
-    for e in employees:
-        G.add_node(f"emp::{e.id}", type="employee", name=e.full_name, role=e.role)
+def _topic_values(session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return func.json_each(CommEdge.topics).table_valued("value")
+    if dialect == "postgresql":
+        return func.json_array_elements_text(cast(CommEdge.topics, JSON)).table_valued("value")
+    return None
 
-    edges = session.query(CommEdge).all()
-    topic_weight = defaultdict(float)
-    for e in edges:
-        topics = json.loads(e.topics)
-        for t in topics:
-            topic_node = f"topic::{t}"
-            if not G.has_node(topic_node):
-                G.add_node(topic_node, type="topic", name=t)
-            G.add_edge(
-                f"emp::{e.from_employee_id}",
-                topic_node,
-                type="MENTIONS",
-                weight=e.weight,
-            )
-            topic_weight[t] += e.weight
+
+def _aggregate_in_python(session):
+    totals = defaultdict(lambda: [0.0, 0, 0])
+    edges = session.query(
+        CommEdge.from_employee_id, CommEdge.weight, CommEdge.message_count_30d, CommEdge.topics
+    )
+    for from_id, weight, count, topics in edges:
+        for t in json.loads(topics):
+            entry = totals[(from_id, t)]
+            entry[0] += weight
+            entry[1] += 1
+            entry[2] += count
+    return [(from_id, t, w, n, m) for (from_id, t), (w, n, m) in totals.items()]
+
+
+def knowledge_edges(session, min_weight=None, top_k_per_employee=None):
+    # One row per (employee, topic): summed weight, number of comm edges and
+    # messages that mention the topic. Parallel channel/capacity edges fold in.
+    topic = _topic_values(session)
+    if topic is None:
+        rows = _aggregate_in_python(session)
+        if min_weight is not None:
+            rows = [r for r in rows if r[2] >= min_weight]
+        if top_k_per_employee is not None:
+            by_employee = defaultdict(list)
+            for r in rows:
+                by_employee[r[0]].append(r)
+            rows = [
+                r
+                for group in by_employee.values()
+                for r in sorted(group, key=lambda r: (-r[2], r[1]))[:top_k_per_employee]
+            ]
+        return sorted(rows, key=lambda r: (r[0], -r[2], r[1]))
+
+    weight = func.sum(CommEdge.weight)
+    stmt = (
+        select(
+            CommEdge.from_employee_id.label("employee_id"),
+            topic.c.value.label("topic"),
+            weight.label("weight"),
+            func.count().label("edge_count"),
+            func.sum(CommEdge.message_count_30d).label("message_count"),
+        )
+        .select_from(CommEdge)
+        .join(topic, true())
+        .group_by(CommEdge.from_employee_id, topic.c.value)
+    )
+    if min_weight is not None:
+        stmt = stmt.having(weight >= min_weight)
+    if top_k_per_employee is not None:
+        ranked = stmt.add_columns(
+            func.row_number()
+            .over(partition_by=CommEdge.from_employee_id, order_by=(weight.desc(), topic.c.value))
+            .label("rn")
+        ).subquery()
+        stmt = select(
+            ranked.c.employee_id,
+            ranked.c.topic,
+            ranked.c.weight,
+            ranked.c.edge_count,
+            ranked.c.message_count,
+        ).where(ranked.c.rn <= top_k_per_employee)
+        order = (ranked.c.employee_id, ranked.c.weight.desc(), ranked.c.topic)
+    else:
+        order = (CommEdge.from_employee_id, weight.desc(), topic.c.value)
+    return [tuple(r) for r in session.execute(stmt.order_by(*order))]
+
+
+def topic_weights(session):
+    topic = _topic_values(session)
+    if topic is None:
+        totals = defaultdict(float)
+        for _, t, w, _, _ in _aggregate_in_python(session):
+            totals[t] += w
+        return dict(totals)
+    rows = session.execute(
+        select(topic.c.value, func.sum(CommEdge.weight))
+        .select_from(CommEdge)
+        .join(topic, true())
+        .group_by(topic.c.value)
+    )
+    return {t: w for t, w in rows}
+
+
+def build_knowledge_graph(session, min_weight=None, top_k_per_employee=None) -> CompactGraph:
+    G = CompactGraph(directed=True)
+    employees = session.query(Employee.id, Employee.full_name, Employee.role).filter(Employee.deleted_at.is_(None))
+    for emp_id, name, role in employees:
+        G.add_node(f"emp::{emp_id}", type="employee", name=name, role=role)
+
+    weights = topic_weights(session)
+    for emp_id, t, weight, edge_count, message_count in knowledge_edges(
+        session, min_weight=min_weight, top_k_per_employee=top_k_per_employee
+    ):
+        topic_node = f"topic::{t}"
+        if topic_node not in G.node_index:
+            G.add_node(topic_node, type="topic", name=t, weight=round(weights.get(t, 0.0), 3))
+        G.add_edge(
+            f"emp::{emp_id}",
+            topic_node,
+            type="MENTIONS",
+            weight=round(weight, 3),
+            edge_count=edge_count,
+            message_count=message_count,
+        )
     return G
 
 
-def graph_summary(session):
-    G = build_comm_graph(session)
-    if G.number_of_nodes() == 0:
+def graph_summary(session, limit=10):
+    nodes = session.query(func.count(Employee.id)).filter(Employee.deleted_at.is_(None)).scalar()
+    if not nodes:
         return {
             "nodes": 0,
             "edges": 0,
@@ -62,18 +161,30 @@ def graph_summary(session):
             "top_receivers": [],
         }
 
-    out_deg = sorted(G.out_degree(weight="weight"), key=lambda x: x[1], reverse=True)
-    in_deg = sorted(G.in_degree(weight="weight"), key=lambda x: x[1], reverse=True)
+    pairs = session.query(CommEdge.from_employee_id, CommEdge.to_employee_id).distinct().subquery()
+    edges = session.query(func.count()).select_from(pairs).scalar()
+
+    def top_by(column):
+        total = func.sum(CommEdge.weight).label("total")
+        rows = (
+            session.query(column, total)
+            .group_by(column)
+            .order_by(total.desc(), column)
+            .limit(limit)
+            .all()
+        )
+        return [(employee_id, weight) for employee_id, weight in rows]
+
     return {
-        "nodes": G.number_of_nodes(),
-        "edges": G.number_of_edges(),
-        "top_senders": out_deg[:10],
-        "top_receivers": in_deg[:10],
+        "nodes": nodes,
+        "edges": edges,
+        "top_senders": top_by(CommEdge.from_employee_id),
+        "top_receivers": top_by(CommEdge.to_employee_id),
     }
 
 
 def build_department_graph(session):
-    employees = session.query(Employee).all()
+    employees = session.query(Employee).filter(Employee.deleted_at.is_(None)).all()
     emp_role = {e.id: e.role for e in employees}
     roles = sorted({e.role for e in employees})
 
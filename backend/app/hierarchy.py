@@ -0,0 +1,250 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, delete, func, insert, literal, select, true, update
+from sqlalchemy.orm import aliased
+
+from .models import CommDailyRollup, CommEvent, Employee, EmployeeClosure, Task
+
+
+# Guards the recursive rebuild against manager_id cycles in bad data.
+MAX_DEPTH = 64
+CLOSURE_COLUMNS = ["ancestor_id", "descendant_id", "depth"]
+
+
+class HierarchyError(Exception):
+    pass
+
+
+def rebuild_closure(session):
+    session.execute(delete(EmployeeClosure))
+    tree = (
+        select(
+            Employee.id.label("ancestor_id"),
+            Employee.id.label("descendant_id"),
+            literal(0).label("depth"),
+        )
+        .where(Employee.deleted_at.is_(None))
+        .cte("tree", recursive=True)
+    )
+    tree = tree.union_all(
+        select(tree.c.ancestor_id, Employee.id, tree.c.depth + 1)
+        .join(Employee, Employee.manager_id == tree.c.descendant_id)
+        .where(tree.c.depth < MAX_DEPTH, Employee.deleted_at.is_(None))
+    )
+    session.execute(insert(EmployeeClosure).from_select(CLOSURE_COLUMNS, select(tree)))
+    return session.execute(select(func.count()).select_from(EmployeeClosure)).scalar_one()
+
+
+def add_employee(session, employee_id, manager_id=None):
+    # The new employee is a leaf: its self row plus one row per ancestor of
+    # its manager (including the manager itself).
+    session.execute(insert(EmployeeClosure).values(ancestor_id=employee_id, descendant_id=employee_id, depth=0))
+    if manager_id is not None:
+        session.execute(
+            insert(EmployeeClosure).from_select(
+                CLOSURE_COLUMNS,
+                select(
+                    EmployeeClosure.ancestor_id, literal(employee_id), EmployeeClosure.depth + 1
+                ).where(EmployeeClosure.descendant_id == manager_id),
+            )
+        )
+
+
+def _subtree_ids(employee_id):
+    return select(EmployeeClosure.descendant_id).where(EmployeeClosure.ancestor_id == employee_id)
+
+
+def _detach(session, employee_id):
+    # Drop every path that enters the subtree from above it.
+    subtree = _subtree_ids(employee_id)
+    session.execute(
+        delete(EmployeeClosure)
+        .where(EmployeeClosure.descendant_id.in_(subtree))
+        .where(EmployeeClosure.ancestor_id.notin_(subtree))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def move_employee(session, employee_id, manager_id):
+    if manager_id is not None:
+        inside = session.execute(
+            select(EmployeeClosure.depth).where(
+                EmployeeClosure.ancestor_id == employee_id, EmployeeClosure.descendant_id == manager_id
+            )
+        ).first()
+        if inside is not None:
+            raise HierarchyError("An employee cannot report to themselves or to someone in their own subtree")
+    _detach(session, employee_id)
+    if manager_id is not None:
+        above = aliased(EmployeeClosure)
+        below = aliased(EmployeeClosure)
+        session.execute(
+            insert(EmployeeClosure).from_select(
+                CLOSURE_COLUMNS,
+                select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+                .select_from(above)
+                .join(below, true())
+                .where(above.descendant_id == manager_id)
+                .where(below.ancestor_id == employee_id),
+            )
+        )
+    session.query(Employee).filter(Employee.id == employee_id).update(
+        {Employee.manager_id: manager_id}, synchronize_session="fetch"
+    )
+
+
+def remove_employee(session, employee_id):
+    # Direct reports move up to the employee's manager (or become roots):
+    # every path through the employee gets one level shorter.
+    manager_id = session.execute(select(Employee.manager_id).where(Employee.id == employee_id)).scalar()
+    above = select(EmployeeClosure.ancestor_id).where(
+        EmployeeClosure.descendant_id == employee_id, EmployeeClosure.depth > 0
+    )
+    below = select(EmployeeClosure.descendant_id).where(
+        EmployeeClosure.ancestor_id == employee_id, EmployeeClosure.depth > 0
+    )
+    session.execute(
+        update(EmployeeClosure)
+        .where(EmployeeClosure.ancestor_id.in_(above), EmployeeClosure.descendant_id.in_(below))
+        .values(depth=EmployeeClosure.depth - 1)
+        .execution_options(synchronize_session=False)
+    )
+    session.execute(
+        delete(EmployeeClosure)
+        .where((EmployeeClosure.ancestor_id == employee_id) | (EmployeeClosure.descendant_id == employee_id))
+        .execution_options(synchronize_session=False)
+    )
+    return session.execute(
+        update(Employee)
+        .where(Employee.manager_id == employee_id)
+        .values(manager_id=manager_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _employee_dict(emp, depth):
+    return {
+        "id": emp.id,
+        "full_name": emp.full_name,
+        "role": emp.role,
+        "team": emp.team,
+        "manager_id": emp.manager_id,
+        "depth": depth,
+    }
+
+
+def subtree(session, employee_id, max_depth=None, limit=200, offset=0):
+    stmt = (
+        select(Employee, EmployeeClosure.depth)
+        .join(EmployeeClosure, EmployeeClosure.descendant_id == Employee.id)
+        .where(EmployeeClosure.ancestor_id == employee_id, EmployeeClosure.depth > 0)
+        .order_by(EmployeeClosure.depth, Employee.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    if max_depth is not None:
+        stmt = stmt.where(EmployeeClosure.depth <= max_depth)
+    return [_employee_dict(emp, depth) for emp, depth in session.execute(stmt)]
+
+
+def ancestors(session, employee_id):
+    rows = session.execute(
+        select(Employee, EmployeeClosure.depth)
+        .join(EmployeeClosure, EmployeeClosure.ancestor_id == Employee.id)
+        .where(EmployeeClosure.descendant_id == employee_id, EmployeeClosure.depth > 0)
+        .order_by(EmployeeClosure.depth)
+    )
+    return [_employee_dict(emp, depth) for emp, depth in rows]
+
+
+def span_of_control(session, employee_id):
+    direct, total, levels = session.execute(
+        select(
+            func.coalesce(func.sum(case((EmployeeClosure.depth == 1, 1), else_=0)), 0),
+            func.count(),
+            func.coalesce(func.max(EmployeeClosure.depth), 0),
+        ).where(EmployeeClosure.ancestor_id == employee_id, EmployeeClosure.depth > 0)
+    ).one()
+    return {"employee_id": employee_id, "direct_reports": direct, "total_reports": total, "levels": levels}
+
+
+def rollup(session, employee_id, days=30, now=None):
+    # One row for the employee's whole subtree plus one per direct report's
+    # subtree. Each aggregate is a correlated count: group members come from
+    # the closure primary key, their messages and tasks from the
+    # (employee, timestamp) / (employee, day) / (assignee, status) indexes.
+    # Internal messages join the recipient back to the closure by primary key;
+    # an IN (subquery) there is re-run by SQLite for every message row.
+    # Messages already compacted into comm_daily_rollups count too; a rollup
+    # day that straddles the window start is counted whole.
+    since = (now or datetime.utcnow()) - timedelta(days=days)
+    group = aliased(EmployeeClosure)
+    member = aliased(EmployeeClosure)
+    peer = aliased(EmployeeClosure)
+
+    def count_of(stmt):
+        return stmt.correlate(group).scalar_subquery()
+
+    def messages(side, internal=False):
+        total = None
+        for model, measure, recent in (
+            (CommEvent, func.count(), CommEvent.timestamp >= since),
+            (CommDailyRollup, func.coalesce(func.sum(CommDailyRollup.message_count), 0), CommDailyRollup.day >= since.date()),
+        ):
+            stmt = (
+                select(measure)
+                .select_from(model)
+                .join(member, and_(member.descendant_id == getattr(model, side), member.ancestor_id == group.descendant_id))
+                .where(recent)
+            )
+            if internal:
+                stmt = stmt.join(
+                    peer, and_(peer.descendant_id == model.to_employee_id, peer.ancestor_id == group.descendant_id)
+                )
+            total = count_of(stmt) if total is None else total + count_of(stmt)
+        return total
+
+    headcount = count_of(
+        select(func.count()).select_from(member).where(member.ancestor_id == group.descendant_id)
+    )
+    sent = messages("from_employee_id")
+    received = messages("to_employee_id")
+    internal = messages("from_employee_id", internal=True)
+    open_tasks = count_of(
+        select(func.count())
+        .select_from(Task)
+        .join(member, and_(member.descendant_id == Task.assignee_id, member.ancestor_id == group.descendant_id))
+        .where(Task.status != "done")
+    )
+    rows = session.execute(
+        select(
+            group.descendant_id,
+            group.depth,
+            Employee.full_name,
+            Employee.role,
+            headcount,
+            sent,
+            received,
+            internal,
+            open_tasks,
+        )
+        .join(Employee, Employee.id == group.descendant_id)
+        .where(group.ancestor_id == employee_id, group.depth <= 1)
+        .order_by(group.depth, group.descendant_id)
+    ).all()
+    groups = [
+        {
+            "employee_id": emp_id,
+            "full_name": name,
+            "role": role,
+            "headcount": heads,
+            "messages_sent": sent_count,
+            "messages_received": received_count,
+            "messages_internal": internal_count,
+            "open_tasks": tasks,
+        }
+        for emp_id, _, name, role, heads, sent_count, received_count, internal_count, tasks in rows
+    ]
+    if not groups:
+        return None
+    return {"days": days, "since": since.isoformat(), "total": groups[0], "direct_reports": groups[1:]}
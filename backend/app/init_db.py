@@ -1,9 +1,64 @@
-﻿from .db import Base, engine
+﻿from sqlalchemy import inspect
+
+from .db import Base, engine, SessionLocal
 from . import models  # noqa: F401
+from .ranking import backfill_ranks
+from .search import install_search
+from .expertise import rebuild_expertise
+from .hierarchy import rebuild_closure
+
+
+def add_missing_columns():
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = (
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                    f"{column.type.compile(dialect=engine.dialect)}"
+                )
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                conn.exec_driver_sql(ddl)
+                print(f"Added column {table.name}.{column.name}")
+
+
+def create_missing_indexes():
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 def main():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    create_missing_indexes()
+    install_search(engine)
+
+    session = SessionLocal()
+    try:
+        backfill_ranks(session)
+        has_employees = session.query(models.Employee.id).first() is not None
+        if has_employees and session.query(models.EmployeeClosure.ancestor_id).first() is None:
+            rebuild_closure(session)
+        # Compacted history lives only in the daily rollups.
+        has_events = (
+            session.query(models.CommEvent.id).first() is not None
+            or session.query(models.CommDailyRollup.id).first() is not None
+        )
+        if has_events and session.query(models.TopicExpertise.id).first() is None:
+            rebuild_expertise(session)
+        session.commit()
+    finally:
+        session.close()
     print("Database schema ensured.")
 
 
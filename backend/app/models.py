@@ -9,6 +9,8 @@ from sqlalchemy import (
     Float,
     Text,
     ForeignKey,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 
@@ -24,13 +26,28 @@ class Employee(Base):
     team = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
     discord_handle = Column(String, unique=True, nullable=False)
-    manager_id = Column(Integer, ForeignKey("employees.id"), nullable=True)
+    manager_id = Column(Integer, ForeignKey("employees.id"), nullable=True, index=True)
     location = Column(String, nullable=False)
     start_date = Column(Date, nullable=False)
+    # Set by a soft delete (see deletion.py); such employees are hidden from
+    # listings, graphs and the org hierarchy but keep their comm history.
+    deleted_at = Column(DateTime, nullable=True)
 
     manager = relationship("Employee", remote_side=[id], backref="reports")
 
 
+class EmployeeClosure(Base):
+    # One row per (ancestor, descendant) pair in the management tree,
+    # including depth-0 self rows; maintained by hierarchy.py.
+    __tablename__ = "employee_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_employee_closure_descendant", "descendant_id", "depth"),)
+
+
 class CommEdge(Base):
     __tablename__ = "comm_edges"
 
@@ -64,6 +81,41 @@ class CommEvent(Base):
     from_employee = relationship("Employee", foreign_keys=[from_employee_id])
     to_employee = relationship("Employee", foreign_keys=[to_employee_id])
 
+    __table_args__ = (
+        Index("ix_comm_events_from_ts", "from_employee_id", "timestamp"),
+        Index("ix_comm_events_to_ts", "to_employee_id", "timestamp"),
+    )
+
+
+class CommDailyRollup(Base):
+    # Raw comm events past the retention window, compacted to one row per
+    # day and (from, to, channel, capacity, topic); see retention.py.
+    __tablename__ = "comm_daily_rollups"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    from_employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    to_employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    channel = Column(String, nullable=False)
+    capacity = Column(String, nullable=False)
+    topic = Column(String, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "from_employee_id",
+            "to_employee_id",
+            "channel",
+            "capacity",
+            "topic",
+            name="uq_comm_daily_rollups_key",
+        ),
+        Index("ix_comm_daily_rollups_from_day", "from_employee_id", "day"),
+        Index("ix_comm_daily_rollups_to_day", "to_employee_id", "day"),
+    )
+
 
 class Board(Base):
     __tablename__ = "boards"
@@ -108,6 +160,8 @@ class Task(Base):
     reporter = relationship("Employee", foreign_keys=[reporter_id])
     parent_board = relationship("Board")
 
+    __table_args__ = (Index("ix_tasks_assignee_status", "assignee_id", "status"),)
+
 
 class BoardCard(Base):
     __tablename__ = "board_cards"
@@ -117,11 +171,20 @@ class BoardCard(Base):
     task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
     column_id = Column(Integer, ForeignKey("board_columns.id"), nullable=False)
     order_index = Column(Integer, nullable=False)
+    # Fractional rank key (see ranking.py); byte-wise collation on Postgres.
+    rank = Column(
+        String().with_variant(String(collation="C"), "postgresql"),
+        nullable=False,
+        default="",
+        server_default="",
+    )
 
     board = relationship("Board")
     task = relationship("Task")
     column = relationship("BoardColumn")
 
+    __table_args__ = (Index("ix_board_cards_column_rank", "column_id", "rank"),)
+
 
 class Decision(Base):
     __tablename__ = "decisions"
@@ -151,3 +214,47 @@ class ChangeLog(Base):
     evidence = Column(Text, nullable=True)
     source = Column(String, nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_change_log_created", "created_at", "id"),
+        Index("ix_change_log_entity", "entity_type", "entity_id", "created_at"),
+        Index("ix_change_log_source", "source", "created_at"),
+    )
+
+
+class TopicExpertise(Base):
+    __tablename__ = "topic_expertise"
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    # Sum of 2^((t - epoch) / half_life) per message; see expertise.py.
+    score = Column(Float, nullable=False, default=0.0)
+    sent_count = Column(Integer, nullable=False, default=0)
+    received_count = Column(Integer, nullable=False, default=0)
+    counterpart_count = Column(Integer, nullable=False, default=0)
+    last_at = Column(DateTime, nullable=True)
+
+    employee = relationship("Employee")
+
+    __table_args__ = (
+        UniqueConstraint("topic", "employee_id", name="uq_topic_expertise_topic_employee"),
+        Index("ix_topic_expertise_topic_score", "topic", "score"),
+    )
+
+
+class ExpertiseEpoch(Base):
+    # Single row: the time topic_expertise.score is measured from. Missing
+    # means expertise.DEFAULT_EPOCH.
+    __tablename__ = "expertise_epoch"
+
+    id = Column(Integer, primary_key=True)
+    epoch = Column(DateTime, nullable=False)
+
+
+class TopicCounterpart(Base):
+    __tablename__ = "topic_counterparts"
+
+    topic = Column(String, primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    counterpart_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from .db import DATA_DIR
+from .models import CommDailyRollup, CommEdge, CommEvent, Employee
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional: pip install pyarrow
+    pa = pc = pq = None
+
+
+DEFAULT_DIR = DATA_DIR / "parquet"
+CHUNK_SIZE = 100_000
+TABLES = ["comm_events", "comm_edges", "comm_daily_rollups"]
+
+
+def require_arrow():
+    if pa is None:
+        raise RuntimeError("Parquet export and analytics need pyarrow: pip install pyarrow")
+
+
+def _schemas():
+    # Low-cardinality strings are dictionary-encoded, in Arrow and in the
+    # Parquet pages, so scans only decode small integer codes.
+    label = pa.dictionary(pa.int32(), pa.string())
+    people = [
+        ("from_employee_id", pa.int32()),
+        ("to_employee_id", pa.int32()),
+        ("from_team", label),
+        ("to_team", label),
+        ("channel", label),
+        ("capacity", label),
+    ]
+    return {
+        "comm_events": pa.schema(
+            [("id", pa.int64()), ("timestamp", pa.timestamp("us"))]
+            + people
+            + [("topic", label), ("summary", pa.string())]
+        ),
+        "comm_edges": pa.schema(
+            [("id", pa.int64())]
+            + people
+            + [
+                ("weight", pa.float64()),
+                ("message_count_30d", pa.int32()),
+                ("last_interaction_at", pa.timestamp("us")),
+                ("topics", pa.list_(pa.string())),
+            ]
+        ),
+        "comm_daily_rollups": pa.schema(
+            [("day", pa.date32())]
+            + people
+            + [("topic", label), ("message_count", pa.int32()), ("last_at", pa.timestamp("us"))]
+        ),
+    }
+
+
+# table -> (model, column that picks the month partition). comm_edges is
+# mutable state whose last_interaction_at moves forward, so it is exported as
+# one unpartitioned snapshot that every export replaces whole.
+SOURCES = {
+    "comm_events": (CommEvent, "timestamp"),
+    "comm_edges": (CommEdge, None),
+    "comm_daily_rollups": (CommDailyRollup, "day"),
+}
+
+
+class PartitionWriter:
+    # One Parquet file per month under <root>/<table>/month=YYYY-MM/. Files
+    # are written under a temporary name and swapped in on close, so readers
+    # never see a half-written partition. An export mirrors the table for the
+    # months it covers: partitions from `since` on that got no rows (e.g.
+    # compacted into rollups) are removed, so no message is counted twice.
+    def __init__(self, root, table, schema):
+        self.dir = root / table
+        self.schema = schema
+        self.writers = {}
+        self.rows = 0
+
+    def write(self, batch, months):
+        for month in pc.unique(months).to_pylist():
+            part = batch.filter(pc.equal(months, month))
+            writer = self.writers.get(month)
+            if writer is None:
+                path = self.dir / f"month={month}"
+                path.mkdir(parents=True, exist_ok=True)
+                writer = self.writers[month] = pq.ParquetWriter(
+                    path / "part-0.parquet.tmp", self.schema, compression="zstd"
+                )
+            writer.write_table(part)
+        self.rows += batch.num_rows
+
+    def close(self, since_month=None):
+        if self.dir.is_dir():
+            for path in self.dir.glob("month=*"):
+                month = path.name.split("=", 1)[1]
+                if month not in self.writers and (since_month is None or month >= since_month):
+                    shutil.rmtree(path)
+        for month, writer in self.writers.items():
+            writer.close()
+            path = self.dir / f"month={month}"
+            for old in path.glob("*.parquet"):
+                old.unlink()
+            os.replace(path / "part-0.parquet.tmp", path / "part-0.parquet")
+        return sorted(self.writers)
+
+    def abort(self):
+        for writer in self.writers.values():
+            writer.close()
+        for tmp in self.dir.glob("month=*/part-0.parquet.tmp"):
+            tmp.unlink()
+
+
+class SnapshotWriter:
+    # A single <root>/<table>/part-0.parquet, swapped in on close.
+    def __init__(self, root, table, schema):
+        self.dir = root / table
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.writer = pq.ParquetWriter(self.dir / "part-0.parquet.tmp", schema, compression="zstd")
+        self.rows = 0
+
+    def write(self, batch, months=None):
+        self.writer.write_table(batch)
+        self.rows += batch.num_rows
+
+    def close(self, since_month=None):
+        self.writer.close()
+        # Partitions left by exports before comm_edges became a snapshot.
+        for path in self.dir.glob("month=*"):
+            shutil.rmtree(path)
+        os.replace(self.dir / "part-0.parquet.tmp", self.dir / "part-0.parquet")
+        return None
+
+    def abort(self):
+        self.writer.close()
+        (self.dir / "part-0.parquet.tmp").unlink()
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def _rows_to_batch(rows, schema, teams):
+    columns = {name: [] for name in schema.names}
+    for row in rows:
+        for name, value in row.items():
+            columns[name].append(value)
+        columns["from_team"].append(teams.get(row["from_employee_id"]))
+        columns["to_team"].append(teams.get(row["to_employee_id"]))
+    if "topics" in columns:
+        columns["topics"] = [json.loads(t) for t in columns["topics"]]
+    arrays = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(columns[field.name], pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(columns[field.name], field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def export_table(session, table, root=DEFAULT_DIR, since=None, chunk_size=CHUNK_SIZE):
+    require_arrow()
+    schema = _schemas()[table]
+    model, month_column = SOURCES[table]
+    teams = dict(session.execute(select(Employee.id, Employee.team)).all())
+    source = [getattr(model, name) for name in schema.names if name not in ("from_team", "to_team")]
+    stmt = select(*source).order_by(*model.__table__.primary_key.columns)
+    since_month = None
+    if since is not None and month_column is not None:
+        # Whole months only, since each touched partition is rewritten.
+        start = _month_start(since)
+        since_month = start.strftime("%Y-%m")
+        column = getattr(model, month_column)
+        stmt = stmt.where(column >= (start.date() if month_column == "day" else start))
+
+    writer = (PartitionWriter if month_column else SnapshotWriter)(root, table, schema)
+    try:
+        result = session.execute(stmt.execution_options(yield_per=chunk_size))
+        for rows in result.mappings().partitions(chunk_size):
+            batch = _rows_to_batch(rows, schema, teams)
+            if month_column is None:
+                writer.write(batch)
+                continue
+            stamps = batch[month_column]
+            if pa.types.is_date(stamps.type):
+                stamps = stamps.cast(pa.timestamp("s"))
+            writer.write(batch, pc.strftime(stamps, format="%Y-%m"))
+    except BaseException:
+        writer.abort()
+        raise
+    return {"rows": writer.rows, "months": writer.close(since_month)}
+
+
+def export_parquet(session, root=DEFAULT_DIR, tables=TABLES, since=None, chunk_size=CHUNK_SIZE):
+    if isinstance(since, date) and not isinstance(since, datetime):
+        since = datetime(since.year, since.month, since.day)
+    return {table: export_table(session, table, root, since=since, chunk_size=chunk_size) for table in tables}
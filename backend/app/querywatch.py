@@ -0,0 +1,121 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger("backend.sql")
+
+# Opt-in: SQL_INSTRUMENT=1 enables slow-query logging and per-request /
+# per-command query tracking. The remaining knobs only apply when enabled.
+ENABLED = os.getenv("SQL_INSTRUMENT", "").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET")) if os.getenv("SQL_QUERY_BUDGET") else None
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, tracker):
+        self.tracker = tracker
+        super().__init__(
+            f"{tracker.name} ran {tracker.count} SQL statements (budget {tracker.budget})"
+            + "".join(f"\n  {n}x {sql}" for sql, n in tracker.n_plus_one_suspects())
+        )
+
+
+class QueryTracker:
+    def __init__(self, name, budget=None, threshold=N_PLUS_ONE_THRESHOLD):
+        self.name = name
+        self.budget = budget
+        self.threshold = threshold
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}
+
+    def record(self, statement, parameters, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = [0, set()]
+        entry[0] += 1
+        entry[1].add(repr(parameters))
+
+    def n_plus_one_suspects(self):
+        # The same statement executed many times with different parameters is
+        # the shape of a per-row lazy load or a query inside a loop.
+        return sorted(
+            (
+                (statement, count)
+                for statement, (count, params) in self.statements.items()
+                if count >= self.threshold and len(params) > 1
+            ),
+            key=lambda item: -item[1],
+        )
+
+    def report(self):
+        logger.info("%s: %d SQL statements in %.1f ms", self.name, self.count, self.seconds * 1000)
+        for statement, count in self.n_plus_one_suspects():
+            logger.warning("%s: possible N+1, %dx %s", self.name, count, _one_line(statement))
+
+
+current_tracker = ContextVar("current_tracker", default=None)
+
+
+def _one_line(statement, limit=300):
+    text = " ".join(statement.split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+@contextmanager
+def track_queries(name, budget=None):
+    tracker = QueryTracker(name, budget=budget)
+    token = current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        current_tracker.reset(token)
+    tracker.report()
+    if budget is not None and tracker.count > budget:
+        raise QueryBudgetExceeded(tracker)
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("querywatch_started", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["querywatch_started"].pop()
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning("slow query (%.1f ms): %s", seconds * 1000, _one_line(statement))
+    tracker = current_tracker.get()
+    if tracker is not None:
+        tracker.record(statement, parameters, seconds)
+
+
+def install(target=Engine):
+    # Listening on the Engine class also covers engines created later,
+    # e.g. the CLI's --db engines.
+    if not event.contains(target, "before_cursor_execute", _before):
+        event.listen(target, "before_cursor_execute", _before)
+        event.listen(target, "after_cursor_execute", _after)
+
+
+class QueryWatchMiddleware:
+    def __init__(self, app, budget=QUERY_BUDGET):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries(f"{scope['method']} {scope['path']}", budget=self.budget) as tracker:
+            await self.app(scope, receive, send)
+            route = scope.get("route")
+            if route is not None:
+                tracker.name = f"{scope['method']} {route.path}"
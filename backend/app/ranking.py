@@ -0,0 +1,152 @@
+from sqlalchemy import func
+
+from .models import BoardCard
+
+
+# Rank keys are base-62 fractions ("0.<digits>") stored without the leading
+# "0." and without trailing zeros, so plain byte-wise string comparison
+# matches numeric order and a key can always be generated between two others.
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+REBALANCE_KEY_LENGTH = 16
+
+
+def _midpoint(a, b):
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def rank_between(before=None, after=None):
+    before = before or ""
+    if after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} must sort before {after!r}")
+    if before.endswith("0") or (after is not None and after.endswith("0")):
+        raise ValueError("Rank keys cannot end with '0'")
+    # Appends and prepends step the last digit instead of bisecting towards the
+    # column edge, so keys grow by one character per ~30 moves to the same end.
+    if after is None and before:
+        last = DIGITS.index(before[-1])
+        if last < BASE - 1:
+            return before[:-1] + DIGITS[last + 1]
+        return before + DIGITS[BASE // 2]
+    if not before and after:
+        last = DIGITS.index(after[-1])
+        if last > 1:
+            return after[:-1] + DIGITS[last - 1]
+        return after[:-1] + "0" + DIGITS[BASE // 2]
+    return _midpoint(before, after)
+
+
+def spread_ranks(count):
+    width = 1
+    while BASE**width <= count + 1:
+        width += 1
+    step = BASE**width // (count + 1)
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * step
+        digits = []
+        for _ in range(width):
+            value, d = divmod(value, BASE)
+            digits.append(DIGITS[d])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+
+
+def needs_rebalance(rank):
+    return len(rank) > REBALANCE_KEY_LENGTH
+
+
+def place_card(session, card, column_id, after_card_id=None, before_card_id=None):
+    session.flush()
+    neighbors = {}
+    ids = [i for i in (after_card_id, before_card_id) if i is not None]
+    if ids:
+        neighbors = {
+            c.id: c
+            for c in session.query(BoardCard).filter(BoardCard.id.in_(ids)).all()
+        }
+    for neighbor_id in ids:
+        neighbor = neighbors.get(neighbor_id)
+        if neighbor is None or neighbor.column_id != column_id:
+            raise ValueError(f"Card {neighbor_id} is not in column {column_id}")
+        if neighbor_id == card.id:
+            raise ValueError("A card cannot be placed relative to itself")
+
+    column_cards = session.query(BoardCard.rank).filter(BoardCard.column_id == column_id)
+    if card.id is not None:
+        column_cards = column_cards.filter(BoardCard.id != card.id)
+    if after_card_id is not None:
+        low = neighbors[after_card_id].rank
+        if before_card_id is not None:
+            high = neighbors[before_card_id].rank
+        else:
+            high = (
+                column_cards.filter(BoardCard.rank > low)
+                .with_entities(func.min(BoardCard.rank))
+                .scalar()
+            )
+    elif before_card_id is not None:
+        high = neighbors[before_card_id].rank
+        low = (
+            column_cards.filter(BoardCard.rank < high)
+            .with_entities(func.max(BoardCard.rank))
+            .scalar()
+        )
+    else:
+        high = None
+        low = column_cards.with_entities(func.max(BoardCard.rank)).scalar()
+
+    if low is not None and high is not None and low >= high:
+        # Concurrent moves into the same gap can produce equal keys; spread the
+        # column once and retry against the fresh keys.
+        rebalance_column(session, column_id)
+        return place_card(session, card, column_id, after_card_id, before_card_id)
+
+    card.column_id = column_id
+    card.rank = rank_between(low, high)
+    return card.rank
+
+
+def rebalance_column(session, column_id):
+    cards = (
+        session.query(BoardCard)
+        .filter(BoardCard.column_id == column_id)
+        .order_by(BoardCard.rank, BoardCard.id)
+        .all()
+    )
+    for card, rank in zip(cards, spread_ranks(len(cards))):
+        card.rank = rank
+    return len(cards)
+
+
+def backfill_ranks(session):
+    column_ids = [
+        row[0]
+        for row in session.query(BoardCard.column_id)
+        .filter((BoardCard.rank == "") | BoardCard.rank.is_(None))
+        .distinct()
+        .all()
+    ]
+    for column_id in column_ids:
+        cards = (
+            session.query(BoardCard)
+            .filter(BoardCard.column_id == column_id)
+            .order_by(BoardCard.order_index, BoardCard.id)
+            .all()
+        )
+        for card, rank in zip(cards, spread_ranks(len(cards))):
+            card.rank = rank
+    return len(column_ids)
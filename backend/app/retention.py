@@ -0,0 +1,158 @@
+import gzip
+import json
+import os
+
+from sqlalchemy import case, delete, select
+
+from .db import DATA_DIR
+from .expertise import _dialect_insert
+from .models import CommDailyRollup, CommEvent
+
+
+ARCHIVE_DIR = DATA_DIR / "comm_events_archive"
+EVENT_COLUMNS = [
+    CommEvent.id,
+    CommEvent.timestamp,
+    CommEvent.from_employee_id,
+    CommEvent.to_employee_id,
+    CommEvent.channel,
+    CommEvent.capacity,
+    CommEvent.topic,
+    CommEvent.summary,
+]
+ROLLUP_KEY = ["day", "from_employee_id", "to_employee_id", "channel", "capacity", "topic"]
+
+
+def rollup_rows(rows):
+    rollups = {}
+    for r in rows:
+        key = (
+            r["timestamp"].date(),
+            r["from_employee_id"],
+            r["to_employee_id"],
+            r["channel"],
+            r["capacity"],
+            r["topic"],
+        )
+        entry = rollups.get(key)
+        if entry is None:
+            rollups[key] = [1, r["timestamp"]]
+        else:
+            entry[0] += 1
+            if r["timestamp"] > entry[1]:
+                entry[1] = r["timestamp"]
+    return [
+        {**dict(zip(ROLLUP_KEY, key)), "message_count": count, "last_at": last_at}
+        for key, (count, last_at) in rollups.items()
+    ]
+
+
+def _upsert_rollups(session, rows):
+    stmt = _dialect_insert(session, CommDailyRollup)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "message_count": CommDailyRollup.message_count + excluded.message_count,
+            "last_at": case(
+                (excluded.last_at > CommDailyRollup.last_at, excluded.last_at),
+                else_=CommDailyRollup.last_at,
+            ),
+        },
+    )
+    session.execute(stmt, rows)
+
+
+def _write_segment(rows, archive_dir):
+    # Named by id range, so re-running an interrupted batch overwrites the
+    # same file instead of archiving its rows twice.
+    name = f"segment-{rows[0]['id']:012d}-{rows[-1]['id']:012d}.jsonl.gz"
+    tmp = archive_dir / (name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as fp:
+        for row in rows:
+            fp.write(json.dumps({**row, "timestamp": row["timestamp"].isoformat()}) + "\n")
+    with tmp.open("rb") as fp:
+        os.fsync(fp.fileno())
+    os.replace(tmp, archive_dir / name)
+    return name
+
+
+def _autocommit(session):
+    return session.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def enable_incremental_vacuum(session):
+    # One-off full VACUUM that switches SQLite to auto_vacuum=INCREMENTAL so
+    # later batches can hand freed pages back without rewriting the file.
+    if session.get_bind().dialect.name != "sqlite":
+        return False
+    session.commit()
+    with _autocommit(session) as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    return True
+
+
+def reclaim(session, analyze=False):
+    # SQLite: release free pages (incremental mode only) and refresh planner
+    # stats. Postgres: plain VACUUM does not block reads or writes.
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        conn = session.connection()
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            conn.exec_driver_sql("PRAGMA incremental_vacuum")
+        if analyze:
+            conn.exec_driver_sql("ANALYZE comm_events")
+            conn.exec_driver_sql("ANALYZE comm_daily_rollups")
+        session.commit()
+    elif dialect == "postgresql":
+        session.commit()
+        with _autocommit(session) as conn:
+            conn.exec_driver_sql("VACUUM (ANALYZE) comm_events" if analyze else "VACUUM comm_events")
+            if analyze:
+                conn.exec_driver_sql("ANALYZE comm_daily_rollups")
+
+
+def compact_comm_events(
+    session,
+    older_than,
+    batch_size=5000,
+    archive=False,
+    archive_dir=ARCHIVE_DIR,
+    vacuum_every=20,
+    progress=None,
+):
+    # Each batch folds into comm_daily_rollups and deletes its raw rows in one
+    # short transaction, so writers are never blocked for long and an
+    # interrupted run resumes where it stopped.
+    if archive:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+    compacted = batches = 0
+    last_id = 0
+    while True:
+        rows = [
+            dict(r._mapping)
+            for r in session.execute(
+                select(*EVENT_COLUMNS)
+                .where(CommEvent.timestamp < older_than, CommEvent.id > last_id)
+                .order_by(CommEvent.id)
+                .limit(batch_size)
+            )
+        ]
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        if archive:
+            _write_segment(rows, archive_dir)
+        _upsert_rollups(session, rollup_rows(rows))
+        session.execute(delete(CommEvent).where(CommEvent.id.in_([r["id"] for r in rows])))
+        session.commit()
+        compacted += len(rows)
+        batches += 1
+        if vacuum_every and batches % vacuum_every == 0:
+            reclaim(session)
+        if progress:
+            progress(compacted)
+    if compacted:
+        reclaim(session, analyze=True)
+    return compacted
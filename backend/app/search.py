@@ -0,0 +1,211 @@
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from .models import ChangeLog, CommEvent, Task
+
+
+# (result type, source table, indexed columns with bm25 / tsvector weights)
+SOURCES = [
+    ("comm_event", "comm_events", [("summary", 1.0, "A")]),
+    ("task", "tasks", [("title", 2.0, "A"), ("description", 1.0, "B")]),
+    ("change_log", "change_log", [("evidence", 1.0, "A")]),
+]
+SEARCH_TYPES = [kind for kind, _, _ in SOURCES]
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+SNIPPET_CHARS = 160
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+def _fts_table(table):
+    return f"{table}_fts"
+
+
+def _sqlite_ddl(table, columns):
+    fts = _fts_table(table)
+    names = [c for c, _, _ in columns]
+    cols = ", ".join(names)
+    new = ", ".join(f"new.{c}" for c in names)
+    old = ", ".join(f"old.{c}" for c in names)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', "
+        f"content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+
+
+def _postgres_ddl(table, columns):
+    vector = " || ".join(
+        f"setweight(to_tsvector('english', coalesce({c}, '')), '{label}')" for c, _, label in columns
+    )
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING GIN (search_vector)",
+    ]
+
+
+def install_search(engine, rebuild=False):
+    # SQLite: external-content FTS5 tables kept in sync by triggers.
+    # Postgres: generated tsvector columns with GIN indexes (always in sync).
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+    existing = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for _, table, columns in SOURCES:
+            if dialect == "postgresql":
+                for ddl in _postgres_ddl(table, columns):
+                    conn.exec_driver_sql(ddl)
+                continue
+            created = _fts_table(table) not in existing
+            for ddl in _sqlite_ddl(table, columns):
+                conn.exec_driver_sql(ddl)
+            if created or rebuild:
+                fts = _fts_table(table)
+                conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def fts_query(q):
+    # Quote every token so user input cannot inject FTS5 syntax; the last
+    # token is a prefix match for search-as-you-type.
+    tokens = TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    quoted = [f'"{t}"' for t in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def ts_query(q):
+    # The to_tsquery equivalent of fts_query (websearch_to_tsquery has no
+    # prefix matching): quoted tokens ANDed, the last one a prefix.
+    tokens = TOKEN_RE.findall(q)
+    if not tokens:
+        return None
+    quoted = [f"'{t}'" for t in tokens]
+    quoted[-1] += ":*"
+    return " & ".join(quoted)
+
+
+def _sqlite_hits(session, q, types, limit, offset):
+    match = fts_query(q)
+    if match is None:
+        return []
+    parts = []
+    for kind, table, columns in SOURCES:
+        if kind not in types:
+            continue
+        fts = _fts_table(table)
+        weights = ", ".join(str(w) for _, w, _ in columns)
+        # Each source contributes at most offset+limit best rows before the merge.
+        parts.append(
+            f"SELECT * FROM (SELECT '{kind}' AS type, rowid AS id, bm25({fts}, {weights}) AS score, "
+            f"snippet({fts}, -1, '[', ']', '...', 16) AS snippet FROM {fts} "
+            f"WHERE {fts} MATCH :match ORDER BY score LIMIT :window)"
+        )
+    sql = " UNION ALL ".join(parts) + " ORDER BY score, type, id LIMIT :limit OFFSET :offset"
+    rows = session.execute(
+        text(sql), {"match": match, "window": limit + offset, "limit": limit, "offset": offset}
+    )
+    return [(kind, entry_id, -score, snippet) for kind, entry_id, score, snippet in rows]
+
+
+def _postgres_hits(session, q, types, limit, offset):
+    query = ts_query(q)
+    if query is None:
+        return []
+    parts = []
+    for kind, table, _ in SOURCES:
+        if kind not in types:
+            continue
+        parts.append(
+            f"(SELECT '{kind}' AS type, id, ts_rank_cd(search_vector, query) AS score "
+            f"FROM {table}, to_tsquery('english', :q) AS query "
+            f"WHERE search_vector @@ query ORDER BY score DESC LIMIT :window)"
+        )
+    sql = " UNION ALL ".join(parts) + " ORDER BY score DESC, type, id LIMIT :limit OFFSET :offset"
+    rows = session.execute(text(sql), {"q": query, "window": limit + offset, "limit": limit, "offset": offset})
+    return [(kind, entry_id, score, None) for kind, entry_id, score in rows]
+
+
+def _snippet(value):
+    value = " ".join((value or "").split())
+    return value if len(value) <= SNIPPET_CHARS else value[:SNIPPET_CHARS] + "..."
+
+
+def _load_entities(session, hits):
+    ids = {kind: [entry_id for k, entry_id, _, _ in hits if k == kind] for kind in SEARCH_TYPES}
+    entities = {}
+    if ids["comm_event"]:
+        for e in session.query(CommEvent).filter(CommEvent.id.in_(ids["comm_event"])):
+            entities[("comm_event", e.id)] = {
+                "title": e.summary,
+                "text": e.summary,
+                "timestamp": e.timestamp.isoformat(),
+                "from_employee_id": e.from_employee_id,
+                "to_employee_id": e.to_employee_id,
+                "channel": e.channel,
+                "topic": e.topic,
+            }
+    if ids["task"]:
+        for t in session.query(Task).filter(Task.id.in_(ids["task"])):
+            entities[("task", t.id)] = {
+                "title": t.title,
+                "text": f"{t.title} {t.description}",
+                "status": t.status,
+                "assignee_id": t.assignee_id,
+                "parent_board_id": t.parent_board_id,
+            }
+    if ids["change_log"]:
+        for c in session.query(ChangeLog).filter(ChangeLog.id.in_(ids["change_log"])):
+            entities[("change_log", c.id)] = {
+                "title": f"{c.action} {c.entity_type} {c.entity_id or ''}".strip(),
+                "text": c.evidence,
+                "created_at": c.created_at.isoformat(),
+                "source": c.source,
+            }
+    return entities
+
+
+def search(session, q, types=None, limit=20, offset=0):
+    types = set(types or SEARCH_TYPES)
+    dialect = session.get_bind().dialect.name
+    try:
+        if dialect == "sqlite":
+            hits = _sqlite_hits(session, q, types, limit, offset)
+        elif dialect == "postgresql":
+            hits = _postgres_hits(session, q, types, limit, offset)
+        else:
+            raise SearchUnavailable(f"Search is not supported on {dialect}")
+    except DBAPIError as exc:
+        session.rollback()
+        raise SearchUnavailable("Search index is not installed; run python -m backend.app.init_db") from exc
+
+    entities = _load_entities(session, hits)
+    results = []
+    for kind, entry_id, score, snippet in hits:
+        entity = entities.get((kind, entry_id))
+        if entity is None:
+            continue
+        body = entity.pop("text")
+        results.append(
+            {
+                "type": kind,
+                "id": entry_id,
+                "score": round(score, 4),
+                "snippet": snippet or _snippet(body),
+                **entity,
+            }
+        )
+    return results
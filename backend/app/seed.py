@@ -1,9 +1,10 @@
-﻿import json
+﻿import argparse
+import json
 import random
 from datetime import date, datetime, timedelta
 from pathlib import Path
 
-from .db import Base, engine, SessionLocal, DATA_DIR
+from .db import Base, engine, SessionLocal, DATA_DIR, make_engine
 from .models import (
     Employee,
     CommEvent,
@@ -13,6 +14,11 @@ from .models import (
     Task,
     BoardCard,
 )
+from .ranking import backfill_ranks
+from .search import install_search
+from .expertise import rebuild_expertise
+from .hierarchy import rebuild_closure
+from . import synthetic
 
 
 def seed_employees(session):
@@ -320,24 +326,71 @@ def seed_boards_and_tasks(session):
         )
         order_index += 1
 
+    session.flush()
+    backfill_ranks(session)
 
-def main():
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    Base.metadata.drop_all(bind=engine)
-    with engine.begin() as conn:
+
+def reset_schema(target):
+    Base.metadata.drop_all(bind=target)
+    with target.begin() as conn:
         conn.exec_driver_sql("DROP TABLE IF EXISTS notifications")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=target)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Seed the database. Without size options the fixed 20-person demo company is created."
+    )
+    parser.add_argument("--db", help="Database URL (defaults to DATABASE_URL or the bundled SQLite file)")
+    parser.add_argument("--employees", type=int, help="Generate a synthetic org with this many employees")
+    parser.add_argument("--events", type=int, help="Synthetic comm events (default: 50 per employee)")
+    parser.add_argument("--tasks", type=int, help="Synthetic tasks (default: 2 per employee)")
+    parser.add_argument("--boards", type=int, help="Synthetic boards (default: 1 per 200 employees)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic generator")
+    parser.add_argument("--chunk-size", type=int, default=synthetic.CHUNK_SIZE)
+    args = parser.parse_args(argv)
 
-    session = SessionLocal()
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    target = make_engine(args.db) if args.db else engine
+    reset_schema(target)
+
+    sizes = (args.employees, args.events, args.tasks, args.boards)
+    if any(size is not None for size in sizes):
+        employees = args.employees if args.employees is not None else 1000
+        synthetic.generate(
+            target,
+            employees=employees,
+            events=args.events if args.events is not None else employees * 50,
+            tasks=args.tasks if args.tasks is not None else employees * 2,
+            boards=args.boards if args.boards is not None else max(1, employees // 200),
+            seed=args.seed,
+            chunk_size=args.chunk_size,
+        )
+        install_search(target, rebuild=True)
+        session = SessionLocal(bind=target)
+        try:
+            rebuild_closure(session)
+            rebuild_expertise(session)
+            session.commit()
+        finally:
+            session.close()
+        print(f"Seeded synthetic org at {target.url.render_as_string(hide_password=True)}")
+        return
+
+    session = SessionLocal(bind=target)
     try:
         seed_employees(session)
         seed_comm_events_and_edges(session)
         seed_boards_and_tasks(session)
+        session.flush()
+        rebuild_closure(session)
+        rebuild_expertise(session)
         session.commit()
     finally:
         session.close()
+    install_search(target, rebuild=True)
 
-    print(f"Seeded database at {DATA_DIR / 'org.db'}")
+    print(f"Seeded database at {target.url.render_as_string(hide_password=True)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+import asyncio
+import itertools
+import json
+import threading
+from datetime import datetime
+
+
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15.0
+
+
+class Subscriber:
+    def __init__(self, loop, board_id=None, employee_id=None, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.loop = loop
+        self.board_id = board_id
+        self.employee_id = employee_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def matches(self, event):
+        if self.board_id is not None and self.board_id not in event["board_ids"]:
+            return False
+        if self.employee_id is not None and self.employee_id not in event["employee_ids"]:
+            return False
+        return True
+
+    def push(self, event):
+        # Runs on the subscriber's loop. A slow consumer never blocks publishers:
+        # its backlog is discarded and replaced by one overflow marker that tells
+        # the client to refetch instead of trusting its incremental state.
+        if self.queue.full():
+            dropped = 0
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                dropped += 1
+            self.dropped += dropped
+            self.queue.put_nowait({"id": event["id"], "type": "overflow", "dropped": dropped})
+        self.queue.put_nowait(event)
+
+    async def next_event(self, timeout=HEARTBEAT_SECONDS):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    def subscribe(self, board_id=None, employee_id=None):
+        sub = Subscriber(asyncio.get_running_loop(), board_id=board_id, employee_id=employee_id)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, kind, data, board_ids=(), employee_ids=()):
+        with self._lock:
+            if not self._subscribers:
+                return
+            subscribers = list(self._subscribers)
+        event = {
+            "id": next(self._seq),
+            "type": kind,
+            "at": datetime.utcnow().isoformat(),
+            "board_ids": {b for b in board_ids if b is not None},
+            "employee_ids": {e for e in employee_ids if e is not None},
+            "data": data,
+        }
+        for sub in subscribers:
+            if not sub.matches(event):
+                continue
+            try:
+                sub.loop.call_soon_threadsafe(sub.push, event)
+            except RuntimeError:
+                self.unsubscribe(sub)
+
+
+def event_json(event):
+    payload = {k: event[k] for k in ("id", "type", "at", "data", "dropped") if k in event}
+    return json.dumps(payload, default=str)
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {event_json(event)}\n\n"
+
+
+broker = EventBroker()
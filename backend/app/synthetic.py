@@ -0,0 +1,396 @@
+import csv
+import io
+import json
+import random
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import func, select, text
+
+from .models import (
+    Employee,
+    CommEvent,
+    CommEdge,
+    Board,
+    BoardColumn,
+    Task,
+    BoardCard,
+)
+from .ranking import spread_ranks
+
+
+# Fixed reference time so the same --seed always yields the same database.
+REFERENCE_TIME = datetime(2026, 1, 1)
+EVENT_WINDOW_DAYS = 90
+MANAGER_FANOUT = 8
+CHUNK_SIZE = 50_000
+
+DEPARTMENTS = [
+    # (team prefix, role, share of headcount, head role, topics)
+    ("Engineering", "SWE", 0.55, "CTO", ["release", "bugfix", "performance", "security", "roadmap", "oncall", "architecture", "code_review"]),
+    ("People", "HR", 0.05, "HR", ["hiring", "onboarding", "benefits", "performance_review", "offsite"]),
+    ("Growth", "Marketing", 0.15, "Marketing", ["marketing_launch", "campaign", "brand", "webinar", "analytics"]),
+    ("Revenue", "Sales", 0.25, "Sales", ["pricing", "enterprise_request", "pipeline", "renewal", "contract"]),
+]
+CHANNELS = ["email", "discord", "meeting", "docs"]
+CHANNEL_WEIGHTS = [0.35, 0.4, 0.15, 0.1]
+CAPACITIES = ["FYI", "decision", "coordination", "support", "escalation"]
+CAPACITY_WEIGHTS = [0.35, 0.1, 0.3, 0.2, 0.05]
+SUMMARIES = [
+    "Discussed {topic}",
+    "Follow-up on {topic}",
+    "Decision needed on {topic}",
+    "Status update: {topic}",
+    "Question about {topic}",
+    "Blocked on {topic}",
+]
+FIRST_NAMES = [
+    "Ava", "Noah", "Maya", "Liam", "Priya", "Ethan", "Sofia", "Jonas", "Emma", "David",
+    "Lea", "Tobias", "Nina", "Felix", "Clara", "Oliver", "Mia", "Samuel", "Helena", "Lukas",
+    "Aisha", "Mateo", "Yuki", "Omar", "Ines", "Kai", "Zara", "Ravi", "Elena", "Tom",
+]
+LAST_NAMES = [
+    "Mueller", "Stein", "Ortiz", "Chen", "Nair", "Brooks", "Park", "Weber", "Fischer", "Klein",
+    "Hoffmann", "Berg", "Schaefer", "Braun", "Wolf", "Hahn", "Schubert", "Koch", "Richter", "Vogel",
+    "Khan", "Silva", "Tanaka", "Haddad", "Costa", "Novak", "Ali", "Patel", "Rossi", "Meyer",
+]
+LOCATIONS = ["Munich", "Berlin", "Remote", "London", "Lisbon"]
+BOARD_COLUMNS = ["Backlog", "Todo", "In Progress", "Blocked", "Done"]
+STATUS_COLUMNS = {"todo": "Todo", "in_progress": "In Progress", "blocked": "Blocked", "done": "Done"}
+STATUSES = ["todo", "in_progress", "blocked", "done"]
+STATUS_WEIGHTS = [0.35, 0.25, 0.1, 0.3]
+PRIORITIES = ["low", "medium", "high", "urgent"]
+PRIORITY_WEIGHTS = [0.3, 0.4, 0.22, 0.08]
+
+
+def _zipf_cum_weights(n, rng, exponent=0.8):
+    # Power-law activity: a random permutation decides who the "hubs" are.
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1.0 / r**exponent for r in ranks))
+
+
+def _copy_rows(conn, table, rows):
+    columns = list(rows[0].keys())
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])
+    buf.seek(0)
+    raw = conn.connection.dbapi_connection
+    with raw.cursor() as cur:
+        cur.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+
+
+def bulk_insert(conn, table, rows):
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql":
+        _copy_rows(conn, table, rows)
+    else:
+        conn.execute(table.insert(), rows)
+
+
+def _reset_sequences(conn, tables):
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            )
+        )
+
+
+def build_org(rng, count):
+    # Employee 1 is the CEO, departments get a head each, and everyone else
+    # hangs off a fan-out tree under their department head.
+    employees = [
+        {
+            "id": 1,
+            "full_name": "Helena Richter",
+            "role": "CEO",
+            "team": "Exec",
+            "manager_id": None,
+            "topics": ["roadmap", "pricing", "hiring"],
+        }
+    ]
+    remaining = max(count - 1, 0)
+    sizes = [int(remaining * share) for _, _, share, _, _ in DEPARTMENTS]
+    sizes[0] += remaining - sum(sizes)
+
+    next_id = 2
+    for (dept, role, _, head_role, topics), size in zip(DEPARTMENTS, sizes):
+        members = []
+        for i in range(size):
+            if i == 0:
+                manager_id, team, member_role = 1, dept, head_role
+            else:
+                manager = members[(i - 1) // MANAGER_FANOUT]
+                manager_id, team, member_role = manager["id"], f"{dept} {manager['id']}", role
+            member = {
+                "id": next_id,
+                "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "role": member_role,
+                "team": team,
+                "manager_id": manager_id,
+                "topics": rng.sample(topics, k=min(3, len(topics))),
+            }
+            members.append(member)
+            employees.append(member)
+            next_id += 1
+    return employees
+
+
+def _contacts(employees):
+    # Direct manager, direct reports and peers under the same manager.
+    reports = {}
+    for e in employees:
+        if e["manager_id"] is not None:
+            reports.setdefault(e["manager_id"], []).append(e["id"])
+    contacts = {}
+    for e in employees:
+        near = list(reports.get(e["id"], []))
+        if e["manager_id"] is not None:
+            near.append(e["manager_id"])
+            near.extend(p for p in reports.get(e["manager_id"], []) if p != e["id"])
+        contacts[e["id"]] = near
+    return contacts
+
+
+def insert_employees(conn, employees):
+    start = date(2015, 1, 1)
+    rows = [
+        {
+            "id": e["id"],
+            "full_name": e["full_name"],
+            "role": e["role"],
+            "team": e["team"],
+            "email": f"employee{e['id']}@acme.example",
+            "discord_handle": f"employee{e['id']}",
+            "manager_id": e["manager_id"],
+            "location": LOCATIONS[e["id"] % len(LOCATIONS)],
+            "start_date": start + timedelta(days=(e["id"] * 37) % 3650),
+        }
+        for e in employees
+    ]
+    for i in range(0, len(rows), CHUNK_SIZE):
+        bulk_insert(conn, Employee.__table__, rows[i : i + CHUNK_SIZE])
+        conn.commit()
+
+
+def insert_events_and_edges(conn, rng, employees, count, chunk_size=CHUNK_SIZE, progress=print):
+    ids = [e["id"] for e in employees]
+    if len(ids) < 2 or count <= 0:
+        return 0
+    topics_of = {e["id"]: e["topics"] for e in employees}
+    all_topics = sorted({t for e in employees for t in e["topics"]})
+    contacts = _contacts(employees)
+    sender_cum = _zipf_cum_weights(len(ids), rng)
+    receiver_cum = _zipf_cum_weights(len(ids), rng)
+    window = EVENT_WINDOW_DAYS * 86400
+
+    written = 0
+    while written < count:
+        n = min(chunk_size, count - written)
+        senders = rng.choices(ids, cum_weights=sender_cum, k=n)
+        far = rng.choices(ids, cum_weights=receiver_cum, k=n)
+        channels = rng.choices(CHANNELS, weights=CHANNEL_WEIGHTS, k=n)
+        capacities = rng.choices(CAPACITIES, weights=CAPACITY_WEIGHTS, k=n)
+        rows = []
+        for i in range(n):
+            sender = senders[i]
+            roll = rng.random()
+            if roll < 0.65:
+                receiver = rng.choice(contacts[sender])
+            else:
+                receiver = far[i]
+            if receiver == sender:
+                receiver = ids[(bisect_left(ids, sender) + 1) % len(ids)]
+            topic = rng.choice(topics_of[sender]) if roll < 0.85 else rng.choice(all_topics)
+            offset = rng.randrange(window)
+            rows.append(
+                {
+                    "timestamp": REFERENCE_TIME - timedelta(seconds=offset),
+                    "from_employee_id": sender,
+                    "to_employee_id": receiver,
+                    "channel": channels[i],
+                    "capacity": capacities[i],
+                    "topic": topic,
+                    "summary": SUMMARIES[offset % len(SUMMARIES)].format(topic=topic),
+                }
+            )
+        bulk_insert(conn, CommEvent.__table__, rows)
+        conn.commit()
+        written += n
+        progress(f"comm_events: {written}/{count}")
+
+    # Roughly chunk_size events per sender range.
+    per_range = max(1, len(ids) * chunk_size // count)
+    return insert_edges(conn, ids, per_range, chunk_size, progress)
+
+
+def insert_edges(conn, ids, per_range, chunk_size=CHUNK_SIZE, progress=print):
+    # Edges are aggregated from the loaded events one range of senders at a
+    # time (ix_comm_events_from_ts), so memory is bounded by the distinct
+    # edges of one range and each range commits on its own.
+    key = [CommEvent.from_employee_id, CommEvent.to_employee_id, CommEvent.channel, CommEvent.capacity]
+    total = 0
+    for start in range(0, len(ids), per_range):
+        senders = ids[start : start + per_range]
+        stmt = (
+            select(*key, CommEvent.topic, func.count(), func.max(CommEvent.timestamp))
+            .where(CommEvent.from_employee_id.between(senders[0], senders[-1]))
+            .group_by(*key, CommEvent.topic)
+        )
+        # (from, to, channel, capacity) -> [count, newest timestamp, topics]
+        edges = {}
+        for sender, receiver, channel, capacity, topic, msgs, newest in conn.execute(stmt):
+            entry = edges.setdefault((sender, receiver, channel, capacity), [0, newest, set()])
+            entry[0] += msgs
+            entry[1] = max(entry[1], newest)
+            entry[2].add(topic)
+
+        edge_rows = []
+        for (sender, receiver, channel, capacity), (msgs, newest, topics) in sorted(edges.items()):
+            days_ago = int((REFERENCE_TIME - newest).total_seconds()) // 86400
+            recency_factor = max(0.1, 1.0 - (days_ago / 30.0))
+            edge_rows.append(
+                {
+                    "from_employee_id": sender,
+                    "to_employee_id": receiver,
+                    "channel": channel,
+                    "capacity": capacity,
+                    "weight": round(msgs * recency_factor, 3),
+                    "message_count_30d": msgs,
+                    "last_interaction_at": newest,
+                    "topics": json.dumps(sorted(topics)),
+                    "notes": "Auto-aggregated from comm_events",
+                }
+            )
+            if len(edge_rows) >= chunk_size:
+                bulk_insert(conn, CommEdge.__table__, edge_rows)
+                edge_rows = []
+        bulk_insert(conn, CommEdge.__table__, edge_rows)
+        conn.commit()
+        total += len(edges)
+        progress(f"comm_edges: {total} (senders up to {senders[-1]})")
+    return total
+
+
+def insert_boards_tasks_cards(conn, rng, employees, board_count, task_count, chunk_size=CHUNK_SIZE, progress=print):
+    managers = sorted({e["manager_id"] for e in employees if e["manager_id"] is not None})
+    owners = managers or [employees[0]["id"]]
+    boards = []
+    columns = []
+    for b in range(1, board_count + 1):
+        owner = owners[(b - 1) % len(owners)]
+        boards.append(
+            {
+                "id": b,
+                "name": f"Board {b}",
+                "description": f"Delivery board for team {owner}",
+                "owner_id": owner,
+            }
+        )
+        for idx, name in enumerate(BOARD_COLUMNS):
+            columns.append(
+                {"id": (b - 1) * len(BOARD_COLUMNS) + idx + 1, "board_id": b, "name": name, "order_index": idx}
+            )
+    bulk_insert(conn, Board.__table__, boards)
+    bulk_insert(conn, BoardColumn.__table__, columns)
+    column_id = {(c["board_id"], c["name"]): c["id"] for c in columns}
+
+    ids = [e["id"] for e in employees]
+    manager_of = {e["id"]: e["manager_id"] or e["id"] for e in employees}
+    topics_of = {e["id"]: e["topics"] for e in employees}
+    assignee_cum = _zipf_cum_weights(len(ids), rng, exponent=0.5)
+    cards_by_column = {}
+    written = 0
+    while written < task_count:
+        n = min(chunk_size, task_count - written)
+        assignees = rng.choices(ids, cum_weights=assignee_cum, k=n)
+        statuses = rng.choices(STATUSES, weights=STATUS_WEIGHTS, k=n)
+        priorities = rng.choices(PRIORITIES, weights=PRIORITY_WEIGHTS, k=n)
+        rows = []
+        for i in range(n):
+            task_id = written + i + 1
+            assignee = assignees[i] if rng.random() > 0.05 else None
+            owner = assignee or ids[0]
+            topic = rng.choice(topics_of[owner])
+            board_id = rng.randint(1, board_count) if board_count and rng.random() < 0.7 else None
+            created = REFERENCE_TIME - timedelta(days=rng.randint(1, 180))
+            rows.append(
+                {
+                    "id": task_id,
+                    "title": f"{topic.replace('_', ' ').capitalize()} task {task_id}",
+                    "description": f"Work item about {topic} for team of employee {owner}.",
+                    "status": statuses[i],
+                    "priority": priorities[i],
+                    "assignee_id": assignee,
+                    "reporter_id": manager_of[owner],
+                    "created_at": created,
+                    "updated_at": created + timedelta(days=rng.randint(0, 30)),
+                    "due_date": (created + timedelta(days=rng.randint(7, 90))).date(),
+                    "labels": json.dumps([topic]),
+                    "related_topic": topic,
+                    "parent_board_id": board_id,
+                }
+            )
+            if board_id is not None:
+                key = column_id[(board_id, STATUS_COLUMNS[statuses[i]])]
+                cards_by_column.setdefault(key, []).append((board_id, task_id))
+        bulk_insert(conn, Task.__table__, rows)
+        conn.commit()
+        written += n
+        progress(f"tasks: {written}/{task_count}")
+
+    cards = []
+    card_id = 0
+    for col_id, entries in cards_by_column.items():
+        for (board_id, task_id), rank in zip(entries, spread_ranks(len(entries))):
+            card_id += 1
+            cards.append(
+                {
+                    "id": card_id,
+                    "board_id": board_id,
+                    "task_id": task_id,
+                    "column_id": col_id,
+                    "order_index": card_id,
+                    "rank": rank,
+                }
+            )
+            if len(cards) >= chunk_size:
+                bulk_insert(conn, BoardCard.__table__, cards)
+                conn.commit()
+                cards = []
+    bulk_insert(conn, BoardCard.__table__, cards)
+    conn.commit()
+    progress(f"board_cards: {card_id}")
+
+
+def generate(engine, employees, events, tasks, boards, seed=42, chunk_size=CHUNK_SIZE, progress=print):
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    org = build_org(rng, employees)
+    # Every chunk commits on its own, so no transaction spans the whole run;
+    # the seed resets the schema first, so an interrupted run is just rerun.
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        insert_employees(conn, org)
+        progress(f"employees: {len(org)}")
+        insert_events_and_edges(conn, rng, org, events, chunk_size, progress)
+        insert_boards_tasks_cards(conn, rng, org, boards, tasks, chunk_size, progress)
+        _reset_sequences(
+            conn,
+            [Employee.__table__, Board.__table__, BoardColumn.__table__, Task.__table__, BoardCard.__table__],
+        )
+        conn.commit()
+    progress(f"Generated synthetic org in {time.perf_counter() - started:.1f}s")
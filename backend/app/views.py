@@ -0,0 +1,165 @@
+from pathlib import Path
+
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse
+from sqlalchemy import desc
+
+from .db import SessionLocal
+from .models import Employee, CommEdge, Task, Board, BoardColumn, BoardCard
+from .graph import graph_summary
+
+
+BASE_DIR = Path(__file__).resolve().parent
+router = APIRouter()
+_templates = None
+
+
+def get_templates():
+    # Jinja2 is only imported once an HTML view is actually rendered.
+    global _templates
+    if _templates is None:
+        from fastapi.templating import Jinja2Templates
+
+        _templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+    return _templates
+
+
+def include_views(app):
+    from fastapi.staticfiles import StaticFiles
+
+    app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+    app.include_router(router)
+
+
+@router.get("/graph", response_class=HTMLResponse)
+def graph_view(request: Request, employee_id: int | None = None):
+    session = SessionLocal()
+    try:
+        employees = session.query(Employee).filter(Employee.deleted_at.is_(None)).all()
+        top_edges = (
+            session.query(CommEdge).order_by(desc(CommEdge.weight)).limit(20).all()
+        )
+        summary = graph_summary(session)
+
+        top_contacts = []
+        if employee_id:
+            top_contacts = (
+                session.query(CommEdge)
+                .filter(CommEdge.from_employee_id == employee_id)
+                .order_by(desc(CommEdge.weight))
+                .limit(10)
+                .all()
+            )
+
+        return get_templates().TemplateResponse(
+            request,
+            "graph.html",
+            {
+                "request": request,
+                "employees": employees,
+                "top_edges": top_edges,
+                "top_contacts": top_contacts,
+                "selected_employee_id": employee_id,
+                "summary": summary,
+            },
+        )
+    finally:
+        session.close()
+
+
+@router.get("/graph/viz", response_class=HTMLResponse)
+def graph_viz(request: Request):
+    return get_templates().TemplateResponse(request, "graph_viz.html", {"request": request})
+
+
+@router.get("/graph/departments", response_class=HTMLResponse)
+def graph_departments(request: Request):
+    return get_templates().TemplateResponse(request, "graph_departments.html", {"request": request})
+
+
+@router.get("/tasks", response_class=HTMLResponse)
+def tasks_view(
+    request: Request,
+    assignee_id: int | None = None,
+    status: str | None = None,
+    priority: str | None = None,
+):
+    session = SessionLocal()
+    try:
+        q = session.query(Task)
+        if assignee_id:
+            q = q.filter(Task.assignee_id == assignee_id)
+        if status:
+            q = q.filter(Task.status == status)
+        if priority:
+            q = q.filter(Task.priority == priority)
+
+        tasks = q.order_by(desc(Task.updated_at)).limit(200).all()
+        employees = session.query(Employee).filter(Employee.deleted_at.is_(None)).all()
+
+        return get_templates().TemplateResponse(
+            request,
+            "tasks.html",
+            {
+                "request": request,
+                "tasks": tasks,
+                "employees": employees,
+                "selected_assignee": assignee_id,
+                "selected_status": status,
+                "selected_priority": priority,
+            },
+        )
+    finally:
+        session.close()
+
+
+@router.get("/boards/{board_id}", response_class=HTMLResponse)
+def board_view(request: Request, board_id: int):
+    session = SessionLocal()
+    try:
+        board = session.query(Board).filter(Board.id == board_id).first()
+        if not board:
+            return HTMLResponse("Board not found", status_code=404)
+
+        columns = (
+            session.query(BoardColumn)
+            .filter(BoardColumn.board_id == board_id)
+            .order_by(BoardColumn.order_index)
+            .all()
+        )
+        cards = (
+            session.query(BoardCard)
+            .filter(BoardCard.board_id == board_id)
+            .order_by(BoardCard.rank, BoardCard.id)
+            .all()
+        )
+        tasks = {t.id: t for t in session.query(Task).all()}
+
+        columns_data = []
+        for c in columns:
+            col_cards = [cd for cd in cards if cd.column_id == c.id]
+            columns_data.append(
+                {
+                    "id": c.id,
+                    "name": c.name,
+                    "cards": [
+                        {
+                            "task": tasks.get(cd.task_id),
+                            "order_index": cd.order_index,
+                        }
+                        for cd in col_cards
+                    ],
+                }
+            )
+
+        return get_templates().TemplateResponse(
+            request,
+            "board.html",
+            {
+                "request": request,
+                "board": board,
+                "columns": columns_data,
+            },
+        )
+    finally:
+        session.close()
@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+async def run_load(app, engine, total, concurrency):
+    import httpx
+
+    samples = []
+    stop = asyncio.Event()
+
+    async def sample_pool():
+        while not stop.is_set():
+            samples.append(engine.pool.checkedout())
+            await asyncio.sleep(0.001)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+    ids = set()
+
+    async def post(client, i):
+        nonlocal failures
+        async with semaphore:
+            resp = await client.post(
+                "/api/change-log",
+                json={
+                    "action": "update",
+                    "entity_type": "task",
+                    "entity_id": str(i % 100),
+                    "before_json": {"status": "todo"},
+                    "after_json": {"status": "in_progress"},
+                    "evidence": f"load test {i}",
+                    "source": "load-test",
+                },
+            )
+            if resp.status_code != 200:
+                failures += 1
+            else:
+                ids.add(resp.json()["id"])
+
+    before = engine.pool.checkedout()
+    sampler = asyncio.create_task(sample_pool())
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        await asyncio.gather(*(post(client, i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    return {
+        "requests": total,
+        "failures": failures,
+        "unique_ids": len(ids),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1) if elapsed else None,
+        "checked_out_before": before,
+        "checked_out_max": max(samples, default=0),
+        "checked_out_after": engine.pool.checkedout(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for POST /api/change-log")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=1,
+        help="Fail if more pooled connections than this are checked out at once",
+    )
+    args = parser.parse_args()
+
+    # The engine is created at import time, so point it at a scratch DB first.
+    if "DATABASE_URL" not in os.environ:
+        scratch = Path(tempfile.mkdtemp()) / "changelog_load.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{scratch}"
+
+    from sqlalchemy import event, func, select
+
+    from backend.app.api import app
+    from backend.app.changelog import change_log_writer
+    from backend.app.db import Base, SessionLocal, engine
+    from backend.app.models import ChangeLog
+
+    Base.metadata.create_all(bind=engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+
+    result = asyncio.run(run_load(app, engine, args.requests, args.concurrency))
+    change_log_writer.close()
+
+    session = SessionLocal()
+    try:
+        result["rows"] = session.execute(
+            select(func.count()).select_from(ChangeLog).where(ChangeLog.source == "load-test")
+        ).scalar()
+    finally:
+        session.close()
+    result["transactions"] = len(commits)
+
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+    ok = (
+        result["failures"] == 0
+        and result["unique_ids"] == args.requests
+        and result["rows"] >= args.requests
+        and result["checked_out_after"] == result["checked_out_before"]
+        and result["checked_out_max"] <= args.max_connections
+    )
+    if not ok:
+        print("FAILED: connection usage or write results out of bounds")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from backend.app.compact_graph import CompactGraph, np
+
+
+def synthetic_edges(nodes, edges, seed):
+    rng = random.Random(seed)
+    for _ in range(edges):
+        u = rng.randrange(nodes)
+        v = rng.randrange(nodes - 1)
+        yield u, v if v < u else v + 1, rng.random() * 10
+
+
+def build_compact(nodes, edge_list):
+    G = CompactGraph(directed=True, multigraph=True)
+    for n in range(nodes):
+        G.add_node(n, type="employee")
+    for u, v, w in edge_list:
+        G.add_edge(u, v, weight=w)
+    return G
+
+
+def build_networkx(nodes, edge_list):
+    import networkx as nx
+
+    G = nx.MultiDiGraph()
+    for n in range(nodes):
+        G.add_node(n, type="employee")
+    for u, v, w in edge_list:
+        G.add_edge(u, v, weight=w)
+    return G
+
+
+def compact_degrees(G):
+    return G.out_degree()
+
+
+def networkx_degrees(G):
+    return dict(G.out_degree(weight="weight"))
+
+
+def measure(build, degrees, nodes, edge_list):
+    gc.collect()
+    started = time.perf_counter()
+    G = build(nodes, edge_list)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    degrees(G)
+    degree_seconds = time.perf_counter() - started
+    del G
+
+    gc.collect()
+    tracemalloc.start()
+    G = build(nodes, edge_list)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del G
+    return {
+        "build_seconds": round(build_seconds, 3),
+        "weighted_out_degree_seconds": round(degree_seconds, 4),
+        "memory_mb": round(current / (1024 * 1024), 1),
+        "bytes_per_edge": round(current / max(len(edge_list), 1), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory/time comparison: CompactGraph vs NetworkX")
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-networkx", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    edge_list = list(synthetic_edges(args.nodes, args.edges, args.seed))
+    result = {
+        "nodes": args.nodes,
+        "edges": args.edges,
+        "numpy": np is not None,
+        "compact": measure(build_compact, compact_degrees, args.nodes, edge_list),
+    }
+    if not args.skip_networkx:
+        result["networkx"] = measure(build_networkx, networkx_degrees, args.nodes, edge_list)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{args.nodes} nodes, {args.edges} edges (numpy: {result['numpy']})")
+    for name in ("compact", "networkx"):
+        if name in result:
+            r = result[name]
+            print(
+                f"  {name:<9} build {r['build_seconds']:>7.3f}s  degrees {r['weighted_out_degree_seconds']:>7.4f}s  "
+                f"{r['memory_mb']:>8.1f} MB  ({r['bytes_per_edge']} B/edge)"
+            )
+
+
+if __name__ == "__main__":
+    main()
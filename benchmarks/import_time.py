@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+# Modules that must stay out of the startup path of a JSON-only process.
+LAZY_MODULES = ["networkx", "jinja2"]
+
+
+def measure(module, env=None):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        rows.append({"module": parts[2].strip(), "self_us": self_us, "cumulative_us": cumulative_us})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for backend.main")
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--runs", type=int, default=5, help="Take the fastest of this many cold imports")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, help="Fail if importing takes longer than this")
+    parser.add_argument("--json-only", action="store_true", help="Import with HTML_VIEWS=0")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    env = {"HTML_VIEWS": "0"} if args.json_only else None
+    runs = [measure(args.module, env) for _ in range(args.runs)]
+    best = min(runs, key=lambda rows: next(r["cumulative_us"] for r in rows if r["module"] == args.module))
+    total_ms = next(r["cumulative_us"] for r in best if r["module"] == args.module) / 1000
+    imported = {r["module"] for r in best}
+    leaked = [m for m in LAZY_MODULES if m in imported]
+    top = sorted(best, key=lambda r: r["self_us"], reverse=True)[: args.top]
+
+    result = {
+        "module": args.module,
+        "total_ms": round(total_ms, 1),
+        "modules_imported": len(imported),
+        "eager_heavy_modules": leaked,
+        "top_self_us": top,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import {args.module}: {total_ms:.1f} ms ({len(imported)} modules, best of {args.runs})")
+        for r in top:
+            print(f"  {r['self_us'] / 1000:>8.1f} ms  {r['module']}")
+
+    failures = []
+    if leaked:
+        failures.append(f"imported at startup: {', '.join(leaked)}")
+    if args.max_ms is not None and total_ms > args.max_ms:
+        failures.append(f"{total_ms:.1f} ms exceeds --max-ms {args.max_ms}")
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
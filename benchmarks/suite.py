@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+SIZES = {
+    "small": {"employees": 200, "events": 10_000, "tasks": 1_000, "boards": 5},
+    "medium": {"employees": 2_000, "events": 200_000, "tasks": 10_000, "boards": 20},
+    "large": {"employees": 10_000, "events": 1_000_000, "tasks": 50_000, "boards": 50},
+}
+
+GET_ENDPOINTS = [
+    "/api/graph/edges",
+    "/api/graph/knowledge",
+    "/api/graph/departments",
+    "/api/tasks",
+    "/api/boards/1",
+]
+
+
+def time_case(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "repeat": repeat,
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "mean": round(statistics.fmean(samples), 6),
+        "max": round(max(samples), 6),
+    }
+
+
+def run_worker(size, repeat, seed):
+    # Runs in its own interpreter: DATABASE_URL was set by the parent before
+    # the app (and its module-level engine) is imported.
+    from fastapi.testclient import TestClient
+
+    from backend.app.db import SessionLocal, engine
+    from backend.app.graph import build_comm_graph, build_knowledge_graph
+    from backend.app.seed import reset_schema
+    from backend.app.synthetic import generate
+    from backend.main import app
+
+    spec = SIZES[size]
+    reset_schema(engine)
+    started = time.perf_counter()
+    generate(engine, seed=seed, progress=lambda message: None, **spec)
+    seed_seconds = time.perf_counter() - started
+
+    results = {}
+    with TestClient(app) as client:
+        for path in GET_ENDPOINTS:
+            def call(path=path):
+                resp = client.get(path)
+                resp.raise_for_status()
+
+            results[f"GET {path}"] = time_case(call, repeat)
+
+        counter = iter(range(10**9))
+
+        def post_event():
+            i = next(counter)
+            resp = client.post(
+                "/api/comm/events",
+                json={
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "from_employee_id": 1 + i % spec["employees"],
+                    "to_employee_id": 1 + (i * 7 + 1) % spec["employees"],
+                    "channel": "email",
+                    "capacity": "FYI",
+                    "topic": "roadmap",
+                    "summary": f"benchmark event {i}",
+                },
+            )
+            resp.raise_for_status()
+
+        results["POST /api/comm/events"] = time_case(post_event, repeat * 10)
+
+    session = SessionLocal()
+    try:
+        results["build_comm_graph"] = time_case(lambda: build_comm_graph(session), repeat)
+        results["build_knowledge_graph"] = time_case(lambda: build_knowledge_graph(session), repeat)
+    finally:
+        session.close()
+
+    return {"size": size, **spec, "seed_seconds": round(seed_seconds, 3), "cases": results}
+
+
+def run_size(size, repeat, seed):
+    workdir = Path(tempfile.mkdtemp(prefix=f"bench-{size}-"))
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{workdir / 'bench.db'}")
+    out = workdir / "result.json"
+    subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.suite", "--worker", size,
+            "--repeat", str(repeat), "--seed", str(seed), "--output", str(out),
+        ],
+        env=env,
+        check=True,
+    )
+    with out.open("r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    base_cases = {
+        (run["size"], name): stats["median"]
+        for run in baseline["runs"]
+        for name, stats in run["cases"].items()
+    }
+    regressions = []
+    for run in current["runs"]:
+        for name, stats in run["cases"].items():
+            before = base_cases.get((run["size"], name))
+            if not before:
+                continue
+            change = stats["median"] / before - 1
+            marker = "REGRESSION" if change > threshold else ""
+            print(f"{run['size']:<8} {name:<32} {before:>10.4f}s -> {stats['median']:>10.4f}s {change:+7.1%} {marker}")
+            if change > threshold:
+                regressions.append((run["size"], name, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints and graph builders on synthetic orgs")
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="Baseline JSON results to compare medians against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fail when a case's median is this fraction slower than the baseline (default: 0.2)",
+    )
+    parser.add_argument("--worker", choices=sorted(SIZES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args.repeat, args.seed)
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(result, fp)
+        return
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes: {', '.join(unknown)}")
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "created_at": datetime.utcnow().isoformat(),
+        "runs": [run_size(size, args.repeat, args.seed) for size in sizes],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"FAILED: {len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+from . import pipeline
+
+
+FIRST = ["john", "sara", "mike", "kate", "jeff", "lisa", "mark", "anna", "phillip", "vince", "louise", "greg"]
+LAST = ["arnold", "lay", "skilling", "kitchen", "kaminski", "dasovich", "shackleton", "jones", "taylor", "white"]
+EXTERNAL_DOMAINS = ["aol.com", "yahoo.com", "dynegy.com", "caiso.com"]
+SUBJECTS = [
+    "Re: {word} for Q{q}",
+    "FW: {word} update",
+    "{word} - please review",
+    "Meeting about {word}",
+    "Need your signoff on {word}",
+]
+FILLER = (
+    "Please see the attached notes from this morning. Let me know if you have any questions "
+    "before we send this to the desk. Thanks for the quick turnaround on the numbers. "
+).split()
+
+# pipeline function -> stage it is accounted to
+STAGE_FUNCTIONS = {
+    "_iter_json_array": "decode",
+    "_iter_jsonl": "decode",
+    "_first_key": "field_mapping",
+    "_compile_schema": "field_mapping",
+    "_generic_extract": "field_mapping",
+    "_as_list": "field_mapping",
+    "_extract_email": "regex_extraction",
+    "_parse_ts": "regex_extraction",
+    "_infer_name": "regex_extraction",
+    "_is_enron_sender": "regex_extraction",
+    "_infer_topic": "classification",
+    "_infer_capacity": "classification",
+    "_llm_enrich": "llm_stub",
+}
+STAGES = ["decode", "field_mapping", "regex_extraction", "classification", "llm_stub", "db_writes"]
+
+
+def generate_corpus(path: Path, records, fmt="jsonl", seed=7, people=2000, body_words=80):
+    # Enron-like mail: mostly internal senders, a tail of external ones the
+    # pipeline filters out, mixed key casing and RFC 2822 dates.
+    rng = random.Random(seed)
+    internal = [
+        f"{rng.choice(FIRST)}.{rng.choice(LAST)}{i}@enron.com" for i in range(people)
+    ]
+    external = [f"{rng.choice(FIRST)}{i}@{rng.choice(EXTERNAL_DOMAINS)}" for i in range(people // 10 or 1)]
+    keywords = [k for words in pipeline.TOPIC_RULES.values() for k in words]
+    keywords += [k for words in pipeline.CAPACITY_RULES.values() for k in words]
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+    with path.open("w", encoding="utf-8") as fp:
+        if fmt == "json":
+            fp.write("[\n")
+        for i in range(records):
+            sender = rng.choice(external) if rng.random() < 0.1 else rng.choice(internal)
+            to = rng.sample(internal, k=rng.randint(1, 4))
+            cc = rng.sample(internal, k=rng.randint(0, 3))
+            word = rng.choice(keywords)
+            body = " ".join(rng.choice(FILLER) for _ in range(body_words))
+            ts = start + timedelta(minutes=rng.randint(0, 60 * 24 * 730))
+            if i % 2:
+                rec = {
+                    "From": f"\"{sender.split('@')[0]}\" <{sender}>",
+                    "To": ", ".join(to),
+                    "Cc": ", ".join(cc),
+                    "Subject": rng.choice(SUBJECTS).format(word=word, q=rng.randint(1, 4)),
+                    "Body": f"{body} {word}",
+                    "Date": format_datetime(ts),
+                }
+            else:
+                rec = {
+                    "sender": sender,
+                    "recipients": to,
+                    "cc": cc,
+                    "subject": rng.choice(SUBJECTS).format(word=word, q=rng.randint(1, 4)),
+                    "body": f"{word} {body}",
+                    "date": ts.isoformat(),
+                }
+            line = json.dumps(rec)
+            if fmt == "json":
+                fp.write(line + (",\n" if i < records - 1 else "\n"))
+            else:
+                fp.write(line + "\n")
+        if fmt == "json":
+            fp.write("]\n")
+
+
+class StageTimer:
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+
+    def wrap(self, fn, stage):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - started
+                self.calls[stage] += 1
+
+        return timed
+
+    def wrap_iter(self, fn, stage):
+        # Generators only do work while being advanced, so time each next().
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            it = iter(fn(*args, **kwargs))
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    self.seconds[stage] += time.perf_counter() - started
+                    self.calls[stage] += 1
+                yield item
+
+        return timed
+
+
+class TimedConnection:
+    def __init__(self, conn, timer):
+        self._conn = conn
+        self._timer = timer
+        self.execute = timer.wrap(conn.execute, "db_writes")
+        self.executemany = timer.wrap(conn.executemany, "db_writes")
+        self.commit = timer.wrap(conn.commit, "db_writes")
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _stub_llm(record):
+    return {
+        "role": "Unknown",
+        "team": "Unknown",
+        "task_title": "Unknown",
+        "task_description": "Unknown",
+    }
+
+
+@contextlib.contextmanager
+def instrumented(timer):
+    originals = {name: getattr(pipeline, name) for name in STAGE_FUNCTIONS}
+    try:
+        for name, stage in STAGE_FUNCTIONS.items():
+            fn = _stub_llm if name == "_llm_enrich" else originals[name]
+            wrapper = timer.wrap_iter if name.startswith("_iter_") else timer.wrap
+            setattr(pipeline, name, wrapper(fn, stage))
+        yield
+    finally:
+        for name, fn in originals.items():
+            setattr(pipeline, name, fn)
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_pipeline(input_path: Path, db_path: Path, max_records=None):
+    conn = sqlite3.connect(str(db_path))
+    try:
+        pipeline.ensure_schema(conn)
+        timer = StageTimer()
+        with instrumented(timer), contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            pipeline.seed_from_emails(
+                TimedConnection(conn, timer), pipeline.iter_records(input_path), max_records
+            )
+            total = time.perf_counter() - started
+        processed = conn.execute("SELECT COUNT(*) FROM inferred_employee").fetchone()[0]
+        events = conn.execute("SELECT COUNT(*) FROM comm_events").fetchone()[0]
+    finally:
+        conn.close()
+
+    stages = {stage: round(timer.seconds[stage], 4) for stage in STAGES}
+    stages["other"] = round(max(total - sum(timer.seconds.values()), 0.0), 4)
+    return {
+        "records": processed,
+        "comm_events": events,
+        "seconds": round(total, 4),
+        "records_per_second": round(processed / total, 1) if total else None,
+        "stages": stages,
+        "calls": dict(timer.calls),
+    }
+
+
+def profiled(kind, output, fn):
+    if kind == "cprofile":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn)
+        if output:
+            profiler.dump_stats(output)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+        return result
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        raise SystemExit("pyinstrument is not installed (pip install pyinstrument)")
+    profiler = Profiler()
+    profiler.start()
+    try:
+        result = fn()
+    finally:
+        profiler.stop()
+    if output:
+        Path(output).write_text(profiler.output_html(), encoding="utf-8")
+    print(profiler.output_text(unicode=True), file=sys.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the onboarding pipeline (LLM stubbed)")
+    parser.add_argument("--records", type=int, default=20000, help="Synthetic records to generate")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="jsonl")
+    parser.add_argument("--input", help="Benchmark an existing dataset instead of a synthetic corpus")
+    parser.add_argument("--max-records", type=int, help="Stop after this many ingested records (default: all)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"])
+    parser.add_argument("--profile-output", help="Write .prof (cProfile) or .html (pyinstrument) here")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="onboarding-bench-"))
+    if args.input:
+        input_path = Path(args.input)
+        if not input_path.exists():
+            raise SystemExit(f"Input not found: {input_path}")
+        generate_seconds = 0.0
+    else:
+        input_path = workdir / f"emails.{args.format}"
+        started = time.perf_counter()
+        generate_corpus(input_path, args.records, fmt=args.format, seed=args.seed)
+        generate_seconds = time.perf_counter() - started
+
+    run = functools.partial(run_pipeline, input_path, workdir / "onboarding.db", args.max_records)
+    result = profiled(args.profile, args.profile_output, run) if args.profile else run()
+    result["input"] = str(input_path)
+    result["input_mb"] = round(os.path.getsize(input_path) / (1024 * 1024), 2)
+    result["generate_seconds"] = round(generate_seconds, 3)
+    result["peak_rss_mb"] = peak_rss_mb()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"input: {result['input']} ({result['input_mb']} MB)")
+    print(f"records: {result['records']}  comm_events: {result['comm_events']}")
+    print(f"total: {result['seconds']:.3f}s  ({result['records_per_second']} records/s)")
+    for stage, seconds in result["stages"].items():
+        share = seconds / result["seconds"] if result["seconds"] else 0
+        print(f"  {stage:<18} {seconds:>9.3f}s {share:>6.1%}")
+    print(f"peak RSS: {result['peak_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+
+# Compressed dumps are recognised by magic bytes, not by file extension, and
+# decompressed as a stream: nothing is written to disk and callers sniff the
+# format on the decompressed bytes via peek().
+
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+CHUNK_SIZE = 1 << 20
+READAHEAD_CHUNKS = 8
+
+
+def detect_codec(path: Path):
+    with path.open("rb") as fp:
+        head = fp.read(6)
+    return next((codec for magic, codec in MAGIC.items() if head.startswith(magic)), None)
+
+
+def _decompressor(codec, raw):
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=raw)
+    if codec == "bz2":
+        return bz2.BZ2File(raw)
+    if codec == "xz":
+        return lzma.LZMAFile(raw)
+    if zstandard is None:
+        raise RuntimeError("Reading .zst input needs zstandard: pip install zstandard")
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+
+
+class ReadaheadReader(io.RawIOBase):
+    # Decompresses on a background thread into a bounded queue. zlib, bz2,
+    # lzma and zstd release the GIL while inflating, so decompression overlaps
+    # with JSON decoding and parsing instead of alternating with it.
+    def __init__(self, source):
+        self.source = source
+        self.chunks = queue.Queue(maxsize=READAHEAD_CHUNKS)
+        self.current = memoryview(b"")
+        self.done = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._fill, daemon=True)
+        self.thread.start()
+
+    def _fill(self):
+        try:
+            while not self.stopped.is_set():
+                chunk = self.source.read(CHUNK_SIZE)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except BaseException as exc:
+            self._put(exc)
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.current and not self.done:
+            item = self.chunks.get()
+            if isinstance(item, BaseException):
+                self.done = True
+                raise item
+            if not item:
+                self.done = True
+            self.current = memoryview(item)
+        n = min(len(buffer), len(self.current))
+        buffer[:n] = self.current[:n]
+        self.current = self.current[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self.stopped.set()
+            self.thread.join()
+            self.source.close()
+        super().close()
+
+
+def open_input(path: Path, threaded=True):
+    # Binary, buffered and peekable whatever the codec; plain files are
+    # returned as is.
+    codec = detect_codec(path)
+    if codec is None:
+        return path.open("rb")
+    raw = path.open("rb")
+    try:
+        stream = _decompressor(codec, raw)
+    except BaseException:
+        raw.close()
+        raise
+    if threaded:
+        stream = ReadaheadReader(stream)
+    return io.BufferedReader(stream, buffer_size=CHUNK_SIZE)
@@ -0,0 +1,100 @@
+import hashlib
+import math
+import re
+import sqlite3
+from datetime import timezone
+
+
+# The Enron dumps hold the same message once per folder it was filed in
+# (sent_items, inbox, all_documents, ...). A message is identified by its
+# normalized sender, recipient set, subject, timestamp and body.
+
+FLUSH_EVERY = 10000
+
+
+def _normalize_text(value):
+    return re.sub(r"\s+", " ", value).strip()
+
+
+def message_digest(record):
+    body = hashlib.blake2b(_normalize_text(record.body).encode("utf-8"), digest_size=16).digest()
+    ts = record.timestamp
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    key = "\x1f".join(
+        [
+            record.sender.lower(),
+            ",".join(sorted({r.lower() for r in record.recipients})),
+            _normalize_text(record.subject).lower(),
+            ts.replace(tzinfo=None).isoformat(),
+        ]
+    )
+    return hashlib.blake2b(key.encode("utf-8") + body, digest_size=16).digest()
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.size = bits
+        self.hashes = max(int(round(bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hashing over the two halves of an already uniform digest.
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, digest):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+class SeenSet:
+    # Bloom filter in front of an on-disk table of 16-byte digests. A Bloom
+    # miss means "new" without touching disk; a hit is confirmed against the
+    # table, so false positives never drop a message. Past `capacity` the
+    # filter only gets slower, never wrong.
+    def __init__(self, path=":memory:", capacity=1_000_000, error_rate=0.01):
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen_messages (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.pending = set()
+        self.unique = 0
+        self.duplicates = 0
+        for (digest,) in self.conn.execute("SELECT digest FROM seen_messages"):
+            self.bloom.add(digest)
+
+    def _stored(self, digest):
+        if digest in self.pending:
+            return True
+        row = self.conn.execute("SELECT 1 FROM seen_messages WHERE digest = ?", (digest,)).fetchone()
+        return row is not None
+
+    def add(self, record):
+        # True if the record is new (and remembers it), False for a duplicate.
+        digest = message_digest(record)
+        if digest in self.bloom and self._stored(digest):
+            self.duplicates += 1
+            return False
+        self.bloom.add(digest)
+        self.pending.add(digest)
+        if len(self.pending) >= FLUSH_EVERY:
+            self.flush()
+        self.unique += 1
+        return True
+
+    def flush(self):
+        if self.pending:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_messages (digest) VALUES (?)", ((d,) for d in self.pending)
+            )
+            self.conn.commit()
+            self.pending.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -1,15 +1,23 @@
 ﻿import argparse
+import functools
+import io
 import json
 import re
 import sqlite3
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
 from urllib.request import Request, urlopen
 from urllib.error import HTTPError, URLError
 import os
 
+from .compression import open_input
+from .dedup import SeenSet
+from .mail_readers import iter_maildir, iter_mbox, looks_like_mbox
+
 
 FIELD_MAP = {
     "sender": ["from", "sender", "from_email", "from_address", "From"],
@@ -20,6 +28,8 @@ FIELD_MAP = {
     "body": ["body", "content", "text", "Body"],
     "timestamp": ["date", "sent_at", "timestamp", "sent", "Date"],
 }
+# Order of the values returned by the record extractors
+FIELDS = ["sender", "recipients", "cc", "bcc", "subject", "body", "timestamp"]
 
 TOPIC_RULES = {
     "hiring": ["hiring", "interview", "candidate", "recruit"],
@@ -53,6 +63,11 @@ LLM_TIMEOUT_SECONDS = 10
 LLM_MAX_CALLS = 100
 ENRON_DOMAIN = "enron.com"
 
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+ADDRESS_SPLIT_RE = re.compile(r"[,;]")
+# Distinct key layouts compiled before falling back to generic extraction
+MAX_SCHEMAS = 256
+
 
 @dataclass
 class EmailRecord:
@@ -76,7 +91,7 @@ def _as_list(value):
     if isinstance(value, list):
         return value
     if isinstance(value, str):
-        parts = re.split(r"[,;]", value)
+        parts = ADDRESS_SPLIT_RE.split(value)
         return [p.strip() for p in parts if p.strip()]
     return [str(value)]
 
@@ -88,11 +103,30 @@ def _extract_email(value):
                 return str(value[k]).strip()
         return ""
     if isinstance(value, str):
-        m = re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", value)
-        return m.group(0).strip() if m else value.strip()
+        return _normalize_address(value)
     return str(value).strip()
 
 
+@functools.lru_cache(maxsize=65536)
+def _normalize_address(value):
+    m = EMAIL_RE.search(value)
+    return m.group(0).strip() if m else value.strip()
+
+
+@functools.lru_cache(maxsize=65536)
+def _split_addresses(value):
+    # The same To/Cc strings recur across a mailbox; parse each one once.
+    return tuple(_extract_email(v) for v in _as_list(value))
+
+
+def _addresses(value):
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return _split_addresses(value)
+    return [_extract_email(v) for v in _as_list(value)]
+
+
 def _parse_ts(value):
     if not value:
         return datetime.now(timezone.utc)
@@ -218,6 +252,41 @@ def _llm_enrich(record: "EmailRecord"):
         }
 
 
+def _compile_schema(keys):
+    # For one key layout, resolve each FIELD_MAP entry to the candidates that
+    # are actually present, so extraction is a single itemgetter call plus a
+    # fallback only when the preferred key holds an empty value.
+    present = set(keys)
+    found = [[k for k in FIELD_MAP[field] if k in present] for field in FIELDS]
+    primary = [f[0] for f in found if f]
+    slots = []
+    fallbacks = []
+    for pos, keys_for_field in enumerate(found):
+        slots.append(primary.index(keys_for_field[0]) if keys_for_field else None)
+        if len(keys_for_field) > 1:
+            fallbacks.append((pos, keys_for_field[1:]))
+    if not primary:
+        return lambda rec: [None] * len(found)
+    getter = itemgetter(*primary)
+    single = len(primary) == 1
+
+    def extract(rec):
+        got = getter(rec)
+        if single:
+            got = (got,)
+        values = [None if i is None else got[i] for i in slots]
+        for pos, rest in fallbacks:
+            if values[pos] is None or values[pos] == "":
+                values[pos] = _first_key(rec, rest)
+        return values
+
+    return extract
+
+
+def _generic_extract(rec):
+    return [_first_key(rec, FIELD_MAP[field]) for field in FIELDS]
+
+
 def _iter_json_array(fp):
     decoder = json.JSONDecoder()
     buffer = ""
@@ -254,62 +323,102 @@ def _iter_jsonl(fp):
             yield json.loads(line)
 
 
-def iter_records(path: Path):
-    with path.open("r", encoding="utf-8") as fp:
-        first = ""
-        while True:
-            ch = fp.read(1)
-            if not ch:
-                break
-            if not ch.isspace():
-                first = ch
-                break
+def _skip_whitespace(fp):
+    # Drops a UTF-8 BOM and leading whitespace and returns the first real byte
+    # without consuming it, so format sniffing also works on a decompressed,
+    # non-seekable stream.
+    if fp.peek(3)[:3] == b"\xef\xbb\xbf":
+        fp.read(3)
+    while True:
+        head = fp.peek(1)[:1]
+        if not head or not head.isspace():
+            return head
+        fp.read(1)
 
-        fp.seek(0)
-        if first == "[":
-            records_iter = _iter_json_array(fp)
-        elif first == "{":
-            data = json.load(fp)
-            if isinstance(data, dict):
-                flat = []
-                for v in data.values():
-                    if isinstance(v, list):
-                        flat.extend(v)
-                    elif isinstance(v, dict):
-                        flat.append(v)
-                records_iter = flat
+
+def _iter_json_object(fp):
+    # A JSONL file also starts with "{", but its first line is a complete
+    # object followed by more lines. The stream cannot be rewound, so lines
+    # read while deciding are parsed once and reused.
+    line = fp.readline()
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        data = json.loads(line + fp.read())
+    else:
+        rest = next((r for r in fp if r.strip()), None)
+        if rest is not None:
+            yield data
+            yield from _iter_jsonl(chain([rest], fp))
+            return
+    if isinstance(data, dict):
+        for v in data.values():
+            if isinstance(v, list):
+                yield from v
+            elif isinstance(v, dict):
+                yield v
+    else:
+        yield from data
+
+
+def _iter_file(path: Path, workers=None):
+    # Plain or compressed (see compression.py): a file starting with "From "
+    # is an mbox, anything else JSON/JSONL.
+    with open_input(path) as fp:
+        if looks_like_mbox(fp):
+            yield from iter_mbox(fp, workers)
+            return
+        first = _skip_whitespace(fp)
+        with io.TextIOWrapper(fp, encoding="utf-8") as text:
+            if first == b"[":
+                yield from _iter_json_array(text)
+            elif first == b"{":
+                yield from _iter_json_object(text)
             else:
-                records_iter = data
-        else:
-            records_iter = _iter_jsonl(fp)
-
-        for rec in records_iter:
-            sender_raw = _first_key(rec, FIELD_MAP["sender"]) or ""
-            to_raw = _first_key(rec, FIELD_MAP["recipients"]) or []
-            cc_raw = _first_key(rec, FIELD_MAP["cc"]) or []
-            bcc_raw = _first_key(rec, FIELD_MAP["bcc"]) or []
-            subject = _first_key(rec, FIELD_MAP["subject"]) or "(no subject)"
-            body = _first_key(rec, FIELD_MAP["body"]) or ""
-            ts_raw = _first_key(rec, FIELD_MAP["timestamp"]) or ""
-
-            sender = _extract_email(sender_raw)
-            recipients = [
-                _extract_email(v)
-                for v in (_as_list(to_raw) + _as_list(cc_raw) + _as_list(bcc_raw))
-            ]
-            recipients = [r for r in recipients if r and r != sender]
-            if not sender or not recipients:
-                continue
-            if not _is_enron_sender(sender):
-                continue
-
-            yield EmailRecord(
-                sender=sender,
-                recipients=recipients,
-                subject=str(subject),
-                body=str(body),
-                timestamp=_parse_ts(ts_raw),
-            )
+                yield from _iter_jsonl(text)
+
+
+def _iter_source(path: Path, workers=None):
+    # A directory is a maildir tree. workers sizes the RFC 822 parser pool
+    # (None = one per CPU, 1 = parse inline).
+    if path.is_dir():
+        return iter_maildir(path, workers)
+    return _iter_file(path, workers)
+
+
+def iter_records(path: Path, workers=None):
+    # Exports are usually uniform, so extractors are compiled per key
+    # layout (in file order) and reused for every record that shares it.
+    schemas = {}
+    for rec in _iter_source(path, workers):
+        if not isinstance(rec, dict):
+            continue
+        layout = tuple(rec)
+        extract = schemas.get(layout)
+        if extract is None:
+            extract = _compile_schema(layout) if len(schemas) < MAX_SCHEMAS else _generic_extract
+            if len(schemas) < MAX_SCHEMAS:
+                schemas[layout] = extract
+        sender_raw, to_raw, cc_raw, bcc_raw, subject, body, ts_raw = extract(rec)
+
+        sender = _extract_email(sender_raw or "")
+        if not sender or not _is_enron_sender(sender):
+            continue
+        recipients = [
+            r
+            for r in (*_addresses(to_raw), *_addresses(cc_raw), *_addresses(bcc_raw))
+            if r and r != sender
+        ]
+        if not recipients:
+            continue
+
+        yield EmailRecord(
+            sender=sender,
+            recipients=recipients,
+            subject=str(subject or "(no subject)"),
+            body=str(body or ""),
+            timestamp=_parse_ts(ts_raw or ""),
+        )
 
 
 def ensure_schema(conn: sqlite3.Connection):
@@ -406,7 +515,7 @@ def ensure_schema(conn: sqlite3.Connection):
     )
 
 
-def seed_from_emails(conn: sqlite3.Connection, records_iter, max_records: int | None):
+def seed_from_emails(conn: sqlite3.Connection, records_iter, max_records: int | None, seen: SeenSet | None = None):
     employee_id = {}
     first_seen = {}
 
@@ -446,6 +555,9 @@ def seed_from_emails(conn: sqlite3.Connection, records_iter, max_records: int |
     processed = 0
     llm_calls = 0
     for rec in records_iter:
+        # Duplicates are dropped before they cost an LLM call or an event.
+        if seen is not None and not seen.add(rec):
+            continue
         if llm_calls < LLM_MAX_CALLS:
             llm = _llm_enrich(rec)
             llm_calls += 1
@@ -556,9 +668,19 @@ def seed_from_emails(conn: sqlite3.Connection, records_iter, max_records: int |
 
 def main():
     parser = argparse.ArgumentParser(description="Onboarding email ingestion pipeline")
-    parser.add_argument("--input", required=True, help="Path to email JSON or JSONL dataset")
+    parser.add_argument(
+        "--input", required=True, help="Email JSON/JSONL dataset or mbox file (plain, gz, bz2, xz, zst) or maildir directory"
+    )
     parser.add_argument("--output", default="onboarding/data/onboarding.db", help="Output SQLite DB path")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing DB")
+    parser.add_argument(
+        "--workers", type=int, help="Parser processes for maildir/mbox input (default: one per CPU)"
+    )
+    parser.add_argument("--no-dedup", action="store_true", help="Ingest duplicate copies of the same email")
+    parser.add_argument(
+        "--seen-db",
+        help="Keep the duplicate seen-set in this SQLite file, to dedup across runs (default: in memory)",
+    )
     args = parser.parse_args()
 
     input_path = Path(args.input)
@@ -570,18 +692,23 @@ def main():
     if output_path.exists() and args.overwrite:
         output_path.unlink()
 
-    records_iter = iter_records(input_path)
+    records_iter = iter_records(input_path, args.workers)
     first = next(records_iter, None)
     if not first:
         raise SystemExit("No records loaded. Check input format or field mapping.")
 
+    seen = None if args.no_dedup else SeenSet(args.seen_db or ":memory:")
     conn = sqlite3.connect(str(output_path))
     try:
         ensure_schema(conn)
-        from itertools import chain
-        seed_from_emails(conn, chain([first], records_iter), MAX_RECORDS)
+        seed_from_emails(conn, chain([first], records_iter), MAX_RECORDS, seen)
     finally:
         conn.close()
+        if seen is not None:
+            seen.close()
+
+    if seen is not None:
+        print(f"Unique records: {seen.unique}, duplicates skipped: {seen.duplicates}")
 
     print(f"Wrote SQLite DB to {output_path}")
 
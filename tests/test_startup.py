@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter so modules imported by other tests don't count.
+CHECK = (
+    "import json, sys\n"
+    "import backend.main\n"
+    "from benchmarks.import_time import LAZY_MODULES\n"
+    "print(json.dumps([m for m in LAZY_MODULES if m in sys.modules]))\n"
+)
+
+
+@pytest.mark.parametrize("html_views", ["1", "0"])
+def test_backend_main_does_not_import_heavy_modules(html_views):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHECK],
+        cwd=ROOT,
+        env={**os.environ, "HTML_VIEWS": html_views},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert json.loads(proc.stdout.splitlines()[-1]) == []